@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark the single-pass HTML extractor against the old regex pipeline
+
+Usage:
+    python benchmarks/bench_extract.py                 # built-in corpus
+    python benchmarks/bench_extract.py saved_pages/    # plus your own *.html files
+"""
+
+import os
+import re
+import sys
+import time
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from main import extract_html
+
+def regex_extract(html, max_chars=2000):
+    """The chained regex passes PageLoader.load_page used before"""
+    title_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE)
+    title = title_match.group(1) if title_match else ""
+    content = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
+    content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL | re.IGNORECASE)
+    content = re.sub(r'<[^>]+>', ' ', content)
+    content = re.sub(r'\s+', ' ', content)[:max_chars]
+    return {'title': title, 'text': content}
+
+def article_page(paragraphs, seed=0):
+    """A typical article: head scripts/styles, nav, body text, footer"""
+    rng = random.Random(seed)
+    words = ["duck", "search", "terminal", "browser", "privacy", "python", "network",
+             "engine", "result", "cache", "stream", "parser", "latency", "&amp;"]
+    parts = ["<!DOCTYPE html><html><head><title>Article &amp; Notes</title>"]
+    parts += [f"<script src='/js/{i}.js'></script><script>var cfg{i} = {{a: '<div>', b: {i}}};</script>"
+              for i in range(10)]
+    parts.append("<style>body{margin:0} .nav > li{display:inline}</style></head><body>")
+    parts.append("<nav><ul>" + "".join(f"<li><a href='/s{i}'>Section {i}</a></li>" for i in range(20)) + "</ul></nav>")
+    for i in range(paragraphs):
+        if i % 10 == 0:
+            parts.append(f"<h2 id='s{i}'>Heading {i}</h2>")
+        text = " ".join(rng.choice(words) for _ in range(60))
+        parts.append(f"<p class='body'>{text} <a href='https://example.com/{i}'>link {i}</a></p><!-- ad slot {i} -->")
+    parts.append("<footer>Copyright</footer></body></html>")
+    return "".join(parts)
+
+def builtin_corpus():
+    pages = {
+        "small article": article_page(20),
+        "long article": article_page(2000, seed=1),
+        # Text limits stop the extractor early; make it read everything
+        "script heavy": "<html><body>" + "<script>x = '<p>';</script><p>ok</p>" * 5000 + "</body></html>",
+    }
+    # Pathological inputs for the non-greedy DOTALL patterns
+    pages["unclosed scripts"] = "<script>x" * 6000
+    pages["stray angle brackets"] = "a < b " * 6000 + "<"
+    pages["unclosed tag"] = "<div " + "x" * 200000
+    return pages
+
+def load_corpus(directory):
+    pages = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='replace') as f:
+                pages[name] = f.read()
+    return pages
+
+def time_call(func, html, max_chars, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html, max_chars)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def main():
+    pages = builtin_corpus()
+    for directory in sys.argv[1:]:
+        pages.update(load_corpus(directory))
+    
+    # A huge limit makes both paths process the whole document
+    max_chars = 10 ** 9
+    
+    print(f"{'page':28} {'size':>10} {'regex ms':>10} {'single ms':>10} {'speedup':>8}")
+    print("-" * 70)
+    total_regex = total_single = 0.0
+    for name, html in pages.items():
+        repeat = 5 if len(html) < 500000 else 2
+        regex_time = time_call(regex_extract, html, max_chars, repeat)
+        single_time = time_call(extract_html, html, max_chars, repeat)
+        total_regex += regex_time
+        total_single += single_time
+        print(f"{name[:28]:28} {len(html):>10,} {regex_time * 1000:>10.2f} "
+              f"{single_time * 1000:>10.2f} {regex_time / single_time:>7.1f}x")
+    print("-" * 70)
+    print(f"{'total':28} {'':>10} {total_regex * 1000:>10.2f} {total_single * 1000:>10.2f} "
+          f"{total_regex / total_single:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark and regression check for search result parsing
+
+Replays the recorded responses in benchmarks/fixtures through SearchManager
+using a stand-in for NetworkManager, so no network access is needed.
+
+Usage:
+    python benchmarks/bench_parsers.py                    # compare with baseline.json
+    python benchmarks/bench_parsers.py --update-baseline  # accept current numbers
+    python benchmarks/bench_parsers.py --record "python"  # refresh fixtures from the live engines
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import statistics
+import argparse
+import tracemalloc
+from urllib.parse import urlparse
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, ".."))
+import main
+
+FIXTURES_DIR = os.path.join(BENCH_DIR, "fixtures")
+BASELINE_FILE = os.path.join(BENCH_DIR, "baseline.json")
+QUERY = "python"
+PAGE_FIXTURE = "page.html"
+
+# Machine speed reference: a plain tag scan over the same bytes. Throughput
+# is stored relative to it so the baseline holds across machines and load.
+CALIBRATION_PATTERN = re.compile(r'<[^>]+>')
+
+def fixture_name(engine):
+    kind = "json" if main.SEARCH_ENGINES[engine]["type"] == "api" else "html"
+    return f"{engine}.{kind}"
+
+# ==================== REPLAY NETWORK ====================
+class ReplayResponse:
+    """Just enough of requests.Response for SearchManager"""
+    
+    def __init__(self, url, body, content_type):
+        self.url = url
+        self.content = body
+        self.text = body.decode('utf-8', errors='replace')
+        self.status_code = 200
+        self.headers = {'content-type': content_type}
+        self.encoding = None
+        self.history = []
+        self.from_cache = False
+    
+    def json(self):
+        return json.loads(self.text)
+    
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+    
+    def close(self):
+        pass
+
+class ReplayNetwork:
+    """Stands in for NetworkManager, answering engine URLs from fixtures"""
+    
+    def __init__(self, fixtures_dir):
+        self.responses = {}
+        for engine, config in main.SEARCH_ENGINES.items():
+            path = os.path.join(fixtures_dir, fixture_name(engine))
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    self.responses[urlparse(config['url']).hostname] = (
+                        f.read(),
+                        "application/json" if path.endswith(".json") else "text/html; charset=utf-8"
+                    )
+    
+    def get(self, url, use_tor=False, timeout=10, use_cache=False, stream=False):
+        host = urlparse(url).hostname
+        if host not in self.responses:
+            raise Exception(f"No fixture recorded for {host}")
+        body, content_type = self.responses[host]
+        return ReplayResponse(url, body, content_type)
+
+# ==================== MEASUREMENT ====================
+def best_time(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def relative_speed(text, func, repeat):
+    """Throughput of func as a fraction of the calibration scan over text.
+    
+    The two are timed back to back in every run, so both see the same
+    machine load, and the median ratio is kept.
+    """
+    calibrate = lambda: CALIBRATION_PATTERN.findall(text)
+    ratios = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        calibrate()
+        middle = time.perf_counter()
+        func()
+        ratios.append((middle - start) / (time.perf_counter() - middle))
+    return statistics.median(ratios)
+
+def peak_allocation(func):
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(repeat):
+    state = main.BrowserState.__new__(main.BrowserState)
+    state.use_emoji = True
+    state.tor_enabled = False
+    network = ReplayNetwork(FIXTURES_DIR)
+    search_mgr = main.SearchManager(state, network)
+    report = {}
+    
+    for engine, config in main.SEARCH_ENGINES.items():
+        if urlparse(config['url']).hostname not in network.responses:
+            print(f"  skipping {engine}: no fixture")
+            continue
+        
+        response = network.get(search_mgr._build_url(QUERY, config))
+        size = len(response.content)
+        parse = lambda: search_mgr._extract_results(response.text, engine, QUERY)
+        captcha = lambda: search_mgr._check_captcha(response.text, engine)
+        
+        parse_time = best_time(parse, repeat)
+        captcha_time = best_time(captcha, repeat)
+        report[engine] = {
+            'bytes': size,
+            'results': len(parse()),
+            'parse_ms': parse_time * 1000,
+            'mb_per_s': size / parse_time / 1e6,
+            'relative': relative_speed(response.text, parse, repeat),
+            'peak_kb': peak_allocation(parse) / 1024,
+            'captcha_ms': captcha_time * 1000,
+            'captcha': bool(captcha())
+        }
+    
+    page_path = os.path.join(FIXTURES_DIR, PAGE_FIXTURE)
+    if os.path.exists(page_path):
+        with open(page_path, 'r', encoding='utf-8') as f:
+            html = f.read()
+        size = len(html.encode('utf-8'))
+        # Whole document, as if the text limit were never reached
+        extract = lambda: main.extract_html(html, max_chars=10 ** 9)
+        parse_time = best_time(extract, repeat)
+        report['load_page'] = {
+            'bytes': size,
+            'results': len(extract()['links']),
+            'parse_ms': parse_time * 1000,
+            'mb_per_s': size / parse_time / 1e6,
+            'relative': relative_speed(html, extract, repeat),
+            'peak_kb': peak_allocation(extract) / 1024,
+            'captcha_ms': 0.0,
+            'captcha': False
+        }
+    return report
+
+def check_captcha_pages():
+    """Return engines whose recorded bot check page is not detected"""
+    captcha_dir = os.path.join(FIXTURES_DIR, "captcha")
+    missed = []
+    if not os.path.isdir(captcha_dir):
+        return missed
+    
+    for name in sorted(os.listdir(captcha_dir)):
+        engine = name.rsplit(".", 1)[0]
+        with open(os.path.join(captcha_dir, name), 'r', encoding='utf-8') as f:
+            if not main.CaptchaDetector(engine).check(f.read()):
+                missed.append(engine)
+    return missed
+
+def print_report(report):
+    print(f"{'engine':12} {'bytes':>8} {'results':>7} {'parse ms':>9} {'MB/s':>8} {'relative':>8} {'peak KB':>8} {'captcha ms':>10} {'captcha':>7}")
+    print("-" * 85)
+    for engine, row in report.items():
+        print(f"{engine:12} {row['bytes']:>8,} {row['results']:>7} {row['parse_ms']:>9.3f} {row['mb_per_s']:>8.1f} "
+              f"{row['relative']:>8.3f} {row['peak_kb']:>8.1f} {row['captcha_ms']:>10.3f} {'yes' if row['captcha'] else 'no':>7}")
+
+def check_baseline(report, tolerance):
+    """Return a list of regressions against baseline.json.
+    
+    Result counts and CAPTCHA flags must match exactly. Speed is compared
+    as throughput relative to the calibration scan run in this process,
+    never as absolute MB/s, which depends on the machine.
+    """
+    if not os.path.exists(BASELINE_FILE):
+        print("No baseline.json yet - run with --update-baseline")
+        return []
+    
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    tolerance = baseline.get('tolerance', tolerance) if tolerance is None else tolerance
+    
+    failures = []
+    for engine, expected in baseline.get('engines', {}).items():
+        row = report.get(engine)
+        if row is None:
+            failures.append(f"{engine}: fixture missing")
+            continue
+        if row['captcha']:
+            failures.append(f"{engine}: normal results page flagged as CAPTCHA")
+        if row['results'] != expected['results']:
+            failures.append(f"{engine}: {row['results']} results, expected {expected['results']}")
+        if 'relative' not in expected:
+            failures.append(f"{engine}: baseline has no relative speed - run with --update-baseline")
+            continue
+        floor = expected['relative'] * (1 - tolerance)
+        if row['relative'] < floor:
+            failures.append(f"{engine}: relative speed {row['relative']:.3f} is below {floor:.3f} "
+                            f"(baseline {expected['relative']:.3f}, tolerance {tolerance:.0%})")
+    return failures
+
+def update_baseline(report, tolerance):
+    baseline = {
+        'tolerance': 0.5 if tolerance is None else tolerance,
+        'engines': {engine: {'results': row['results'], 'relative': round(row['relative'], 4)}
+                    for engine, row in report.items()}
+    }
+    with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2)
+        f.write("\n")
+    print(f"Baseline written to {BASELINE_FILE}")
+
+def record(query):
+    """Fetch live responses for every engine and store them as fixtures"""
+    state = main.BrowserState()
+    network = main.NetworkManager(state)
+    search_mgr = main.SearchManager(state, network)
+    for engine, config in main.SEARCH_ENGINES.items():
+        try:
+            response = network.get(search_mgr._build_url(query, config))
+        except Exception as e:
+            print(f"  {engine}: {e}")
+            continue
+        with open(os.path.join(FIXTURES_DIR, fixture_name(engine)), 'wb') as f:
+            f.write(response.content)
+        print(f"  {engine}: {len(response.content):,} bytes")
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Offline SERP parser benchmark")
+    parser.add_argument("--repeat", type=int, default=50, help="timing runs per fixture (best is kept)")
+    parser.add_argument("--tolerance", type=float, default=None,
+                        help="allowed relative throughput drop versus baseline, e.g. 0.5 for 50%%")
+    parser.add_argument("--update-baseline", action="store_true", help="write current numbers to baseline.json")
+    parser.add_argument("--record", metavar="QUERY", help="re-record fixtures from the live engines")
+    args = parser.parse_args()
+    
+    if args.record:
+        record(args.record)
+        return 0
+    
+    report = measure(args.repeat)
+    print_report(report)
+    
+    if args.update_baseline:
+        update_baseline(report, args.tolerance)
+        return 0
+    
+    failures = check_baseline(report, args.tolerance)
+    failures += [f"{engine}: recorded CAPTCHA page not detected" for engine in check_captcha_pages()]
+    if failures:
+        print("\nREGRESSIONS:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nNo regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
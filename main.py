@@ -5,21 +5,22 @@ With Emoji/Icon toggle setting - CAPTCHA Fixed Version
 With Ctrl+X support for immediate quit
 """
 
+import time
+STARTED = time.perf_counter()  # Start of the clock for --startup-profile
+
 import os
 import sys
 import json
 import re
-import time
 import random
 from datetime import datetime
-from urllib.parse import quote, urlparse, parse_qs, unquote
-import subprocess
-import tempfile
-import shutil
+from urllib.parse import quote, urlparse, parse_qs, unquote, urljoin
+from html import unescape as html_unescape
 import signal
 import atexit
 import webbrowser
 import threading
+from functools import lru_cache
 
 # ==================== COLOR CODES ====================
 class Colors:
@@ -202,7 +203,11 @@ SEARCH_ENGINES = {
         "icon": "DDG",
         "requires_tor": False,
         "enabled": True,
-        "type": "html"
+        "type": "html",
+        "rate_limit": {"rate": 0.5, "burst": 2},  # Requests/second per host
+        "cache_ttl": 3600,  # Seconds results stay cached
+        "captcha": {"markers": ["anomaly-modal", "bots use DuckDuckGo too", "challenge-form"], "redirects": [], "status": [202]},  # Signatures of a bot check page
+        "hedge": {"enabled": True, "delay": None}  # Ask a backup engine after delay seconds (None: observed p90)
     },
     "ddg_api": {
         "name": "DuckDuckGo API",
@@ -211,7 +216,11 @@ SEARCH_ENGINES = {
         "icon": "DDG",
         "requires_tor": False,
         "enabled": True,
-        "type": "api"
+        "type": "api",
+        "rate_limit": {"rate": 2.0, "burst": 4},
+        "cache_ttl": 86400,
+        "captcha": {"markers": [], "redirects": [], "status": []},
+        "hedge": {"enabled": True, "delay": None}
     },
     "google": {
         "name": "Google",
@@ -220,7 +229,11 @@ SEARCH_ENGINES = {
         "icon": "GOOGLE",
         "requires_tor": False,
         "enabled": True,
-        "type": "html"
+        "type": "html",
+        "rate_limit": {"rate": 0.3, "burst": 1},
+        "cache_ttl": 3600,
+        "captcha": {"markers": ["unusual traffic from your computer network", "id=\"captcha-form\""], "redirects": ["/sorry/"], "status": [429]},
+        "hedge": {"enabled": True, "delay": None}
     },
     "wikipedia": {
         "name": "Wikipedia",
@@ -229,7 +242,11 @@ SEARCH_ENGINES = {
         "icon": "WIKI",
         "requires_tor": False,
         "enabled": True,
-        "type": "api"
+        "type": "api",
+        "rate_limit": {"rate": 5.0, "burst": 10},
+        "cache_ttl": 86400,
+        "captcha": {"markers": [], "redirects": [], "status": []},
+        "hedge": {"enabled": True, "delay": None}
     },
     "brave": {
         "name": "Brave Search",
@@ -238,14 +255,116 @@ SEARCH_ENGINES = {
         "icon": "BRAVE",
         "requires_tor": False,
         "enabled": True,
-        "type": "html"
+        "type": "html",
+        "rate_limit": {"rate": 0.5, "burst": 2},
+        "cache_ttl": 3600,
+        "captcha": {"markers": ["pow-captcha", "please complete the captcha", "confirm you are human"], "redirects": ["/captcha"], "status": []},
+        "hedge": {"enabled": True, "delay": None}
     }
 }
 
+# ==================== METASEARCH SETTINGS ====================
+METASEARCH = {
+    "quorum": 2,        # Return once this many engines have answered
+    "deadline": 6.0,    # Seconds to wait before returning what has arrived
+    "max_workers": 5    # Engines queried at the same time
+}
+
+# ==================== RESULT CACHE SETTINGS ====================
+RESULT_CACHE = {
+    "max_entries": 1000,  # Least recently used entries are evicted past this
+    "navai_ttl": 86400    # Seconds NavAI instant answers stay cached
+}
+
+# ==================== ENGINE HEALTH SETTINGS ====================
+HEALTH = {
+    "window": 50,               # Recent requests kept per engine
+    "failure_threshold": 3,     # Consecutive failures that open the circuit
+    "cooldown": 300,            # Seconds a failing engine is skipped
+    "captcha_cooldown": 1800    # Seconds an engine is skipped after a CAPTCHA
+}
+
+# ==================== HEDGING SETTINGS ====================
+HEDGING = {
+    "budget": 0.1,          # At most this fraction of searches may send a second request
+    "min_delay": 0.5,       # Never hedge sooner than this many seconds
+    "default_delay": 2.0    # Hedge delay for engines without latency data yet
+}
+
+# ==================== PAGE LOADING SETTINGS ====================
+PAGE_LIMITS = {
+    "max_chars": 256 * 1024,       # Visible text kept per page; the pager shows it a screen at a time
+    "max_bytes": 2 * 1024 * 1024,  # Stop downloading after this many bytes
+    "chunk_size": 16 * 1024        # Bytes read from the socket at a time
+}
+
+# ==================== PREFETCH SETTINGS ====================
+PREFETCH = {
+    "enabled": True,
+    "count": 3,                   # Top results fetched while the list is read
+    "max_workers": 2,             # Pages downloaded at the same time
+    "max_chars": 1024 * 1024,     # Extracted text kept in memory across prefetched pages
+    "over_tor": False             # Tor circuits are slow; only fetch what is opened
+}
+
+# ==================== PAGE ARCHIVE SETTINGS ====================
+ARCHIVE = {
+    "enabled": False,                  # Opt in with 'archive on'; Tor pages are never archived
+    "max_bytes": 256 * 1024 * 1024     # Blob store quota; least recently opened pages go first
+}
+
+# ==================== API SERVER SETTINGS ====================
+SERVER = {
+    "host": "127.0.0.1",    # Only local tools by default
+    "port": 8765,
+    "max_concurrent": 16,   # Requests handled at once
+    "queue_timeout": 5.0,   # Seconds a request waits for a slot before 503
+    "drain_timeout": 30.0   # Seconds shutdown waits for in-flight requests
+}
+
+# ==================== TRANSPORT SETTINGS ====================
+TRANSPORT = {
+    "client": "requests",       # "httpx" enables HTTP/2 (pip install "httpx[http2]")
+    "pool_connections": 10,     # Hosts kept warm
+    "pool_maxsize": 10,         # Connections kept per host
+    "retries": 2,               # Retries on connection errors and retry_statuses
+    "backoff_factor": 0.3,      # Sleep 0.3s, 0.6s, ... between retries
+    "retry_statuses": [500, 502, 503, 504]
+}
+
+# Config file section for each settings dict above
+SETTINGS = {
+    'hedging': HEDGING,
+    'metasearch': METASEARCH,
+    'cache': RESULT_CACHE,
+    'page': PAGE_LIMITS,
+    'health': HEALTH,
+    'prefetch': PREFETCH,
+    'archive': ARCHIVE,
+    'server': SERVER,
+    'transport': TRANSPORT
+}
+# Values as shipped, before the config file is applied (JSON round trip = deep copy)
+SETTINGS_DEFAULTS = json.loads(json.dumps(SETTINGS))
+ENGINE_DEFAULTS = json.loads(json.dumps({engine: {'rate_limit': config.get('rate_limit'), 'hedge': config.get('hedge')}
+                                          for engine, config in SEARCH_ENGINES.items()}))
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
 # ==================== GLOBAL FLAGS ====================
 EXIT_FLAG = False
 EXIT_LOCK = threading.Lock()
 
+# Job running on the current thread (set by AsyncCore worker threads)
+JOB_CONTEXT = threading.local()
+
+class JobCancelled(KeyboardInterrupt):
+    """Raised inside a job's worker thread once the job is cancelled.
+    
+    Derives from KeyboardInterrupt so the existing 'except KeyboardInterrupt:
+    raise' handlers let it through instead of falling back to other engines.
+    """
+
 def set_exit_flag():
     """Set global exit flag"""
     global EXIT_FLAG
@@ -259,23 +378,201 @@ def get_exit_flag():
         return EXIT_FLAG
 
 def check_exit_flag():
-    """Check and exit if flag is set"""
+    """Check and exit if flag is set (or if the current background job was cancelled)"""
     if get_exit_flag():
         raise KeyboardInterrupt("Ctrl+X pressed")
+    
+    job = getattr(JOB_CONTEXT, 'job', None)
+    if job is not None and job.cancelled.is_set():
+        raise JobCancelled(f"Job #{job.id} cancelled")
+
+def status_print(*args, **kwargs):
+    """print() for progress messages - silenced inside quiet background jobs"""
+    job = getattr(JOB_CONTEXT, 'job', None)
+    if job is None or not job.quiet:
+        print(*args, **kwargs)
+
+# ==================== PROFILER ====================
+class _NoSpan:
+    """Shared do-nothing span handed out while profiling is off"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def set(self, **args):
+        pass
+
+NO_SPAN = _NoSpan()
+
+class Span:
+    """One timed stage; nests naturally through the with statement"""
+    
+    __slots__ = ('profiler', 'name', 'args', 'start')
+    
+    def __init__(self, profiler, name, args):
+        self.profiler = profiler
+        self.name = name
+        self.args = args
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+        self.profiler.record(self.name, self.start, time.perf_counter(), self.args)
+        return False
+    
+    def set(self, **args):
+        """Attach details learned while the span is open"""
+        self.args.update(args)
+
+class Profiler:
+    """Per-stage timings, aggregated for 'stats' and kept as Chrome trace events.
+    
+    Disabled, span() returns NO_SPAN without allocating, so the cost in
+    the hot paths is one attribute check.
+    """
+    
+    def __init__(self, max_events=20000):
+        from collections import deque
+        self.enabled = False
+        self.events = deque(maxlen=max_events)
+        self.totals = {}          # name -> [count, total seconds, max seconds]
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+    
+    def span(self, name, **args):
+        if not self.enabled:
+            return NO_SPAN
+        return Span(self, name, args)
+    
+    def record(self, name, start, end, args):
+        duration = end - start
+        with self.lock:
+            total = self.totals.get(name)
+            if total is None:
+                self.totals[name] = [1, duration, duration]
+            else:
+                total[0] += 1
+                total[1] += duration
+                if duration > total[2]:
+                    total[2] = duration
+            self.events.append((name, start, duration, threading.get_ident(), args))
+    
+    def stats(self):
+        """[(name, count, total, mean, max)] with the most expensive stage first"""
+        with self.lock:
+            rows = [(name, count, total, total / count, longest)
+                    for name, (count, total, longest) in self.totals.items()]
+        return sorted(rows, key=lambda row: -row[2])
+    
+    def reset(self):
+        with self.lock:
+            self.events.clear()
+            self.totals.clear()
+            self.origin = time.perf_counter()
+    
+    def write_trace(self, path):
+        """Save spans in Chrome trace format (open in chrome://tracing or Perfetto)"""
+        with self.lock:
+            events = list(self.events)
+            origin = self.origin
+        
+        trace = {'traceEvents': [{
+            'name': name,
+            'cat': name.split('.', 1)[0],
+            'ph': 'X',
+            'ts': round((start - origin) * 1e6, 1),
+            'dur': round(duration * 1e6, 1),
+            'pid': os.getpid(),
+            'tid': tid,
+            'args': {key: value if isinstance(value, (int, float, bool)) else str(value)
+                     for key, value in args.items()}
+        } for name, start, duration, tid, args in events], 'displayTimeUnit': 'ms'}
+        
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(trace, f)
+        os.replace(tmp_file, path)
+        return len(events)
+
+PROFILER = Profiler()
+
+class StartupProfile:
+    """Wall-clock cost of each startup step, reported by --startup-profile"""
+    
+    def __init__(self):
+        self.enabled = False
+        self.steps = []
+        self.last = STARTED
+    
+    def mark(self, name):
+        """Close the step that ends now"""
+        now = time.perf_counter()
+        self.steps.append((name, now - self.last))
+        self.last = now
+    
+    def report(self):
+        if not self.enabled:
+            return
+        print(f"\n{'Startup step':28} {'Time':>9}", file=sys.stderr)
+        for name, duration in self.steps:
+            print(f"{name:28} {duration * 1000:7.1f}ms", file=sys.stderr)
+        print(f"{'time to prompt':28} {(self.last - STARTED) * 1000:7.1f}ms", file=sys.stderr)
+        print("Not included: interpreter start and compiling main.py (python -X importtime shows imports).\n"
+              "Deferred to first use: requests and the HTTP session, history database, cache files.",
+              file=sys.stderr)
+
+STARTUP = StartupProfile()
+
+def profile_report():
+    """Per-stage timing table as lines of text"""
+    lines = [f"{'Stage':24} {'Calls':>7} {'Total':>10} {'Mean':>10} {'Max':>10}"]
+    for name, count, total, mean, longest in PROFILER.stats():
+        lines.append(f"{name:24} {count:7d} {total * 1000:8.1f}ms {mean * 1000:8.2f}ms {longest * 1000:8.1f}ms")
+    return lines
+
+def profiled(name):
+    """Decorator that times every call of a function as a span"""
+    def decorator(func):
+        import functools
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not PROFILER.enabled:
+                return func(*args, **kwargs)
+            with Span(PROFILER, name, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
 
 # ==================== NAVAI - REAL AI ====================
 class NavAI:
     """REAL AI that searches the web for answers"""
     
-    def __init__(self, icons):
-        import requests
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+    def __init__(self, icons, cache=None, network=None):
+        self.network = network
+        self._session = None
         self.conversation = []
         self.icons = icons
+        self.cache = cache
+    
+    @property
+    def session(self):
+        # Share the browser's connection pool so DuckDuckGo connections stay warm
+        if self.network:
+            return self.network.session
+        if self._session is None:
+            self._session = create_session()
+        return self._session
         
+    @profiled("ai.ask")
     def ask(self, question: str) -> str:
         """Get real answers by searching the web"""
         try:
@@ -340,19 +637,27 @@ class NavAI:
     def _get_duckduckgo_answer(self, query: str) -> str:
         """Get answer from DuckDuckGo Instant Answer API"""
         try:
-            url = "https://api.duckduckgo.com/"
-            params = {
-                "q": query,
-                "format": "json",
-                "no_html": "1",
-                "skip_disambig": "1"
-            }
-            
-            response = self.session.get(url, params=params, timeout=5)
-            data = response.json()
+            data = self.cache.get("navai", query, RESULT_CACHE['navai_ttl']) if self.cache else None
             
-            # Check exit flag
-            check_exit_flag()
+            if data is None:
+                url = "https://api.duckduckgo.com/"
+                params = {
+                    "q": query,
+                    "format": "json",
+                    "no_html": "1",
+                    "skip_disambig": "1"
+                }
+                
+                response = self.session.get(url, params=params, timeout=5)
+                data = response.json()
+                
+                # Check exit flag
+                check_exit_flag()
+                
+                # Only keep the fields we answer from
+                data = {key: data.get(key, "") for key in ("AbstractText", "Definition", "Answer")}
+                if self.cache:
+                    self.cache.put("navai", query, data)
             
             # Check Abstract (direct answer)
             abstract = data.get("AbstractText", "").strip()
@@ -377,20 +682,91 @@ class NavAI:
             return "No answer found."
 
 # ==================== UTILITIES ====================
-def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+CLEAR_SCREEN = "\x1b[H\x1b[2J\x1b[3J"  # Cursor home, clear screen, clear scrollback
+
+class ScreenBuffer:
+    """Collects a screen while it is drawn and writes it once.
+    
+    Screens print to it explicitly (`print(..., file=screen)`); leaving
+    the block hands the whole screen to file (sys.stdout by default) in
+    one write. sys.stdout itself is never swapped, so status lines from
+    worker threads still go straight to the terminal. Passing an outer
+    buffer as file nests screens.
+    """
+    
+    def __init__(self, file=None):
+        import io
+        self.file = file
+        self.buffer = io.StringIO()
+    
+    def write(self, text):
+        return self.buffer.write(text)
+    
+    def flush(self):
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        text = self.buffer.getvalue()
+        if text:
+            file = self.file or sys.stdout
+            file.write(text)
+            file.flush()
+        return False
 
-def print_header(text, color=Colors.TITLE, width=80):
-    print(f"\n{color}{'━' * width}{Colors.RESET}")
-    print(f"{color}{text.center(width)}{Colors.RESET}")
-    print(f"{color}{'━' * width}{Colors.RESET}")
+def buffered(func):
+    """Draw everything func prints with a single write.
+    
+    func gets the buffer as its screen argument; a caller that is drawing
+    a screen itself passes its own as screen= to draw func inside it.
+    """
+    import functools
+    
+    @functools.wraps(func)
+    def wrapper(*args, screen=None, **kwargs):
+        with ScreenBuffer(screen) as buffer:
+            return func(*args, screen=buffer, **kwargs)
+    return wrapper
 
-def print_box(text, title="", color=Colors.INFO):
-    width = 70
-    print(f"\n{color}╔{'═' * (width-2)}╗{Colors.RESET}")
+def enable_ansi_escapes():
+    """Let the Windows console interpret colour and clear-screen escapes"""
+    if os.name != 'nt':
+        return
+    try:
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.GetStdHandle(-11)  # STD_OUTPUT_HANDLE
+        mode = ctypes.c_uint32()
+        if kernel32.GetConsoleMode(handle, ctypes.byref(mode)):
+            kernel32.SetConsoleMode(handle, mode.value | 0x0004)  # ENABLE_VIRTUAL_TERMINAL_PROCESSING
+    except:
+        pass
+
+def clear_screen(file=None):
+    # An escape sequence instead of forking a 'clear'/'cls' shell
+    print(CLEAR_SCREEN, end="", file=file)
+
+@lru_cache(maxsize=64)
+def render_header(text, color=Colors.TITLE, width=80):
+    rule = f"{color}{'━' * width}{Colors.RESET}"
+    return f"\n{rule}\n{color}{text.center(width)}{Colors.RESET}\n{rule}"
+
+@lru_cache(maxsize=16)
+def render_box_frame(title="", color=Colors.INFO, width=70):
+    """(top, bottom) of a box, title row included"""
+    top = f"\n{color}╔{'═' * (width-2)}╗{Colors.RESET}"
     if title:
-        print(f"{color}║ {title.center(width-4)} ║{Colors.RESET}")
-        print(f"{color}╟{'─' * (width-2)}╢{Colors.RESET}")
+        top += f"\n{color}║ {title.center(width-4)} ║{Colors.RESET}\n{color}╟{'─' * (width-2)}╢{Colors.RESET}"
+    return top, f"{color}╚{'═' * (width-2)}╝{Colors.RESET}"
+
+def print_header(text, color=Colors.TITLE, width=80, file=None):
+    print(render_header(text, color, width), file=file)
+
+@profiled("ui.print_box")
+def print_box(text, title="", color=Colors.INFO, file=None):
+    width = 70
     
     # Check exit flag
     check_exit_flag()
@@ -408,10 +784,14 @@ def print_box(text, title="", color=Colors.INFO):
     if current_line:
         lines.append(current_line)
     
-    for line in lines:
-        print(f"{color}║ {line.ljust(width-4)} ║{Colors.RESET}")
-    
-    print(f"{color}╚{'═' * (width-2)}╝{Colors.RESET}")
+    print_lines(lines, title, color, width, file)
+
+def print_lines(lines, title="", color=Colors.INFO, width=70, file=None):
+    """Frame lines that already fit in width - 4 columns"""
+    top, bottom = render_box_frame(title, color, width)
+    left, right = f"{color}║ ", f" ║{Colors.RESET}"
+    rows = [left + line.ljust(width-4) + right for line in lines]
+    print("\n".join([top] + rows + [bottom]), file=file)
 
 def get_input(prompt="", default=""):
     if default:
@@ -430,24 +810,190 @@ def get_input(prompt="", default=""):
         set_exit_flag()
         raise
 
+# ==================== PAGER ====================
+class TextBuffer:
+    """Document text in fixed-size chunks, read a window at a time"""
+    
+    CHUNK = 16 * 1024
+    
+    def __init__(self, text=""):
+        self.chunks = []
+        self.length = 0
+        self.append(text)
+    
+    def append(self, text):
+        # Top up the last chunk so chunk n always starts at n * CHUNK
+        if self.chunks and len(self.chunks[-1]) < self.CHUNK:
+            room = self.CHUNK - len(self.chunks[-1])
+            self.chunks[-1] += text[:room]
+            self.length += len(text[:room])
+            text = text[room:]
+        for start in range(0, len(text), self.CHUNK):
+            self.chunks.append(text[start:start + self.CHUNK])
+        self.length += len(text)
+    
+    def read(self, start, size):
+        """Up to size characters from offset start"""
+        parts = []
+        index, skip = divmod(start, self.CHUNK)
+        while size > 0 and index < len(self.chunks):
+            part = self.chunks[index][skip:skip + size]
+            parts.append(part)
+            size -= len(part)
+            index += 1
+            skip = 0
+        return ''.join(parts)
+    
+    def find(self, text, start=0):
+        """Offset of the next case-insensitive match at or after start, or -1"""
+        pattern = re.compile(re.escape(text), re.IGNORECASE)
+        overlap = len(text) - 1
+        index = start // self.CHUNK
+        while index < len(self.chunks):
+            window_start = max(start, index * self.CHUNK)
+            # Carry the tail of the previous chunk so matches may straddle chunks
+            window = self.read(window_start, self.CHUNK + overlap - (window_start - index * self.CHUNK))
+            match = pattern.search(window)
+            if match:
+                return window_start + match.start()
+            index += 1
+        return -1
+
+class Pager:
+    """One screen of a long document at a time.
+    
+    Lines are wrapped on demand from the nearest checkpoint (the offset of
+    every CHECKPOINT-th line, recorded as lines are first wrapped), so
+    showing a screen wraps at most CHECKPOINT + height lines however long
+    the document is, and nothing but the visible lines is ever rendered.
+    """
+    
+    CHECKPOINT = 64
+    
+    def __init__(self, text, width=66, height=None):
+        self.buffer = text if isinstance(text, TextBuffer) else TextBuffer(text)
+        self.width = width
+        if height is None:
+            import shutil
+            # Leave room for the header, frame, footer and actions menu
+            height = shutil.get_terminal_size((80, 34)).lines - 16
+        self.height = max(5, height)
+        self.checkpoints = [0]  # checkpoints[n] = offset of line n * CHECKPOINT
+        self.last_search = ""
+    
+    def _wrap(self, pos):
+        """(line, offset of the next line) for the line starting at pos"""
+        window = self.buffer.read(pos, self.width + 1)
+        newline = window.find('\n')
+        if newline != -1:
+            return window[:newline].rstrip(), pos + newline + 1
+        if len(window) <= self.width:
+            return window.rstrip(), pos + len(window)
+        space = window.rfind(' ')
+        if space > 0:
+            return window[:space].rstrip(), pos + space + 1
+        return window[:self.width], pos + self.width
+    
+    def _walk(self, line_no, pos, stop):
+        """Wrap forward from line line_no at pos until stop(line_no, pos) is true, recording checkpoints"""
+        while pos < self.buffer.length and not stop(line_no, pos):
+            _, pos = self._wrap(pos)
+            line_no += 1
+            if line_no % self.CHECKPOINT == 0 and line_no // self.CHECKPOINT == len(self.checkpoints):
+                self.checkpoints.append(pos)
+        return line_no, pos
+    
+    def offset(self, line_no):
+        """Offset where line line_no starts, or None past the end"""
+        base = min(line_no // self.CHECKPOINT, len(self.checkpoints) - 1)
+        reached, pos = self._walk(base * self.CHECKPOINT, self.checkpoints[base],
+                                  lambda n, p: n >= line_no)
+        return pos if reached == line_no and pos < self.buffer.length else None
+    
+    def line_of(self, offset):
+        """Number of the line containing offset"""
+        import bisect
+        # Extend the checkpoints far enough to bracket the offset
+        self._walk((len(self.checkpoints) - 1) * self.CHECKPOINT, self.checkpoints[-1],
+                   lambda n, p: p > offset)
+        base = bisect.bisect_right(self.checkpoints, offset) - 1
+        line_no, pos = base * self.CHECKPOINT, self.checkpoints[base]
+        while True:
+            _, end = self._wrap(pos)
+            if end > offset or end >= self.buffer.length:
+                return line_no
+            line_no, pos = line_no + 1, end
+    
+    def screen(self, top):
+        """The lines visible with line top at the top of the screen"""
+        pos = self.offset(top)
+        lines = []
+        while pos is not None and pos < self.buffer.length and len(lines) < self.height:
+            line, pos = self._wrap(pos)
+            lines.append(line)
+        return lines
+    
+    def line_count(self):
+        """Number of wrapped lines (wraps the rest of the document once)"""
+        base = len(self.checkpoints) - 1
+        line_no, _ = self._walk(base * self.CHECKPOINT, self.checkpoints[base], lambda n, p: False)
+        return line_no
+    
+    def clamp(self, top):
+        """Nearest valid top line: not negative, not past the last screen"""
+        top = max(0, top)
+        if top and self.offset(top) is None:
+            top = max(0, self.line_count() - self.height)
+        return top
+    
+    def find(self, text, top):
+        """Top line showing the next match of text after the current screen's first line, or None"""
+        if text:
+            self.last_search = text
+        if not self.last_search:
+            return None
+        start = self.offset(top + 1)
+        found = self.buffer.find(self.last_search, start) if start is not None else -1
+        if found == -1:
+            # Wrap around to the beginning of the document
+            found = self.buffer.find(self.last_search, 0)
+        return None if found == -1 else self.line_of(found)
+    
+    def progress(self, top):
+        """Share of the document above the end of the screen, 0.0 - 1.0"""
+        if not self.buffer.length:
+            return 1.0
+        end = self.offset(top + self.height)
+        return 1.0 if end is None else end / self.buffer.length
+
 # ==================== BROWSER STATE ====================
 class BrowserState:
     def __init__(self):
         self.use_emoji = False  # Default to Nerd Font icons
         self.icons = Icons.NERD
-        self.history = []
-        self.bookmarks = []
         self.current_results = []
         self.current_page = ""
+        self.current_page_data = None
+        self.current_scroll = 0
         self.current_url = ""
         self.current_title = ""
         self.current_engine = "brave"  # Changed default to Brave to avoid CAPTCHA
         self.tor_enabled = False
         self.tor_process = None
         self.data_file = os.path.expanduser("~/.naviduck_data.json")
+        self.db_file = os.path.expanduser("~/.naviduck_data.db")
         self.config_file = os.path.expanduser("~/.naviduck_config.json")
+        self.cache_file = os.path.expanduser("~/.naviduck_cache.json")
+        self.health_file = os.path.expanduser("~/.naviduck_health.json")
+        self.sessions_dir = os.path.expanduser("~/.naviduck_sessions")
+        self.http_cache_dir = os.path.expanduser("~/.naviduck_http_cache")
+        self.archive_dir = os.path.expanduser("~/.naviduck_archive")
+        self.offline = False  # --offline: pages come from the archive only
+        
+        self._store = None
+        self._archive = None
+        self.store_lock = threading.Lock()
         
-        self.load_data()
         self.load_config()
         atexit.register(self.cleanup)
     
@@ -458,6 +1004,10 @@ class BrowserState:
         else:
             return Icons.NERD.get(icon_name, "?")
     
+    def get_engine_icon(self, engine):
+        """Get icon for a search engine key ('all' for metasearch)"""
+        return self.get_icon(SEARCH_ENGINES.get(engine, {}).get('icon', 'SEARCH'))
+    
     def load_config(self):
         if os.path.exists(self.config_file):
             try:
@@ -470,360 +1020,2164 @@ class BrowserState:
                     for engine, enabled in engine_states.items():
                         if engine in SEARCH_ENGINES:
                             SEARCH_ENGINES[engine]['enabled'] = enabled
+                    
+                    for engine, limit in config.get('rate_limits', {}).items():
+                        if engine in SEARCH_ENGINES:
+                            SEARCH_ENGINES[engine]['rate_limit'] = limit
+                    
+                    for engine, hedge in config.get('hedges', {}).items():
+                        if engine in SEARCH_ENGINES:
+                            SEARCH_ENGINES[engine]['hedge'] = hedge
+                    
+                    for name, settings in SETTINGS.items():
+                        for key, value in config.get(name, {}).items():
+                            if key in settings:
+                                settings[key] = value
             except:
                 pass
     
     def save_config(self):
+        """Write the configuration, keeping only settings that differ from the defaults"""
         config = {
-            'default_engine': self.state.current_engine,
-            'use_emoji': self.state.use_emoji,
+            'default_engine': self.current_engine,
+            'use_emoji': self.use_emoji,
             'engines': {engine: SEARCH_ENGINES[engine]['enabled'] 
                        for engine in SEARCH_ENGINES}
         }
+        
+        # Defaults are left out so that later releases can change them
+        for name, field in (('rate_limits', 'rate_limit'), ('hedges', 'hedge')):
+            changed = {engine: SEARCH_ENGINES[engine].get(field) for engine in SEARCH_ENGINES
+                       if SEARCH_ENGINES[engine].get(field) != ENGINE_DEFAULTS[engine][field]}
+            if changed:
+                config[name] = changed
+        for name, settings in SETTINGS.items():
+            changed = {key: value for key, value in settings.items() if value != SETTINGS_DEFAULTS[name].get(key)}
+            if changed:
+                config[name] = changed
+        
         try:
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=2, ensure_ascii=False)
         except:
             pass
     
+    @property
+    def store(self):
+        """History database, opened on first use"""
+        if self._store is None:
+            with self.store_lock:
+                if self._store is None:
+                    self._store = self.load_data()
+        return self._store
+    
+    @property
+    def archive(self):
+        """Offline page archive, opened on first use"""
+        if self._archive is None:
+            with self.store_lock:
+                if self._archive is None:
+                    self._archive = PageArchive(self.archive_dir, ARCHIVE['max_bytes'])
+        return self._archive
+    
     def load_data(self):
+        store = HistoryStore(self.db_file)
+        
+        # One-time import of the JSON file used by older versions
         if os.path.exists(self.data_file):
             try:
                 with open(self.data_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    self.history = data.get('history', [])
-                    self.bookmarks = data.get('bookmarks', [])
+                store.import_legacy(data.get('history', []), data.get('bookmarks', []))
+                os.replace(self.data_file, self.data_file + ".migrated")
             except:
                 pass
-    
-    def save_data(self):
-        data = {
-            'history': self.history[-100:],
-            'bookmarks': self.bookmarks,
-        }
-        try:
-            with open(self.data_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-        except:
-            pass
+        return store
     
     def add_bookmark(self, title, url):
         """Add bookmark to list"""
-        self.bookmarks.append({
-            'title': title[:80],
-            'url': url,
-            'added': datetime.now().isoformat()
-        })
-        self.save_data()
+        self.store.add_bookmark(title[:80], url)
         return True
     
     def cleanup(self):
+        for opened in (self._store, self._archive):
+            if opened is not None:
+                try:
+                    opened.close()
+                except:
+                    pass
+        
         if self.tor_process:
             try:
                 self.tor_process.terminate()
             except:
                 pass
 
-# ==================== NETWORK MANAGER ====================
-class NetworkManager:
-    def __init__(self, state):
-        self.state = state
-        try:
-            import requests
-            self.session = requests.Session()
-            self.session.headers.update({
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-            })
-        except ImportError:
-            print(f"{Colors.ERROR}❌ requests library not installed!{Colors.RESET}")
-            print(f"{Colors.INFO}Install with: pip install requests{Colors.RESET}")
-            sys.exit(1)
+# ==================== HISTORY STORE ====================
+class HistoryStore:
+    """History and bookmarks in SQLite (WAL): one appended row per event"""
     
-    def get(self, url, use_tor=False, timeout=10):
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY,
+            type TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            query TEXT,
+            engine TEXT,
+            results INTEGER,
+            url TEXT,
+            title TEXT,
+            tor INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp);
+        CREATE INDEX IF NOT EXISTS idx_history_type_timestamp ON history(type, timestamp);
+        CREATE INDEX IF NOT EXISTS idx_history_url ON history(url);
+        CREATE INDEX IF NOT EXISTS idx_history_query ON history(query);
+        CREATE TABLE IF NOT EXISTS bookmarks (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            url TEXT NOT NULL,
+            added TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_bookmarks_url ON bookmarks(url);
+        CREATE TABLE IF NOT EXISTS pages (
+            id INTEGER PRIMARY KEY,
+            url TEXT UNIQUE NOT NULL,
+            title TEXT,
+            content TEXT,
+            visited TEXT NOT NULL,
+            visits INTEGER NOT NULL DEFAULT 1
+        );
+    """
+    # Text index over pages; the triggers keep it in step with the pages table
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+            title, content, content='pages', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='3'
+        );
+        CREATE TRIGGER IF NOT EXISTS pages_ai AFTER INSERT ON pages BEGIN
+            INSERT INTO pages_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END;
+        CREATE TRIGGER IF NOT EXISTS pages_ad AFTER DELETE ON pages BEGIN
+            INSERT INTO pages_fts(pages_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+        END;
+        CREATE TRIGGER IF NOT EXISTS pages_au AFTER UPDATE ON pages BEGIN
+            INSERT INTO pages_fts(pages_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO pages_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END;
+    """
+    HISTORY_COLUMNS = ('type', 'timestamp', 'query', 'engine', 'results', 'url', 'title', 'tor')
+    
+    def __init__(self, db_file):
+        import sqlite3
+        self.db_file = db_file
+        self.lock = threading.Lock()
+        # Searches and page loads are recorded from job threads too
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
         try:
-            # Add random delay to avoid CAPTCHA
-            time.sleep(random.uniform(0.5, 2.0))
-            
-            # Check exit flag
-            check_exit_flag()
-            
-            proxies = self.get_tor_proxies() if use_tor else None
-            response = self.session.get(url, proxies=proxies, timeout=timeout)
-            response.raise_for_status()
-            
-            # Check exit flag
-            check_exit_flag()
-            
-            return response
-        except KeyboardInterrupt:
-            raise
-        except Exception as e:
-            raise Exception(f"Failed to fetch {url}: {e}")
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError:
+            pass
+        self.conn.executescript(self.SCHEMA)
+        try:
+            self.conn.executescript(self.FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: find() falls back to LIKE scans
+            self.fts = False
+        self.conn.commit()
     
-    def get_tor_proxies(self):
-        if self.state.tor_enabled:
-            return {
-                'http': 'socks5h://127.0.0.1:9050',
-                'https': 'socks5h://127.0.0.1:9050'
-            }
-        return None
-
-# ==================== SIMPLE SEARCH MANAGER (NO BS4 REQUIRED) ====================
-class SearchManager:
-    def __init__(self, state, network):
-        self.state = state
-        self.network = network
+    def _execute(self, sql, params=()):
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            self.conn.commit()
+            return cursor
     
-    def search(self, query, engine=None):
-        engine = engine or self.state.current_engine
-        engine_config = SEARCH_ENGINES.get(engine, SEARCH_ENGINES["brave"])
-        
-        if not engine_config['enabled']:
-            print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} Search engine '{engine_config['name']}' is disabled{Colors.RESET}")
-            print(f"{Colors.INFO}Enable it in settings (engines command){Colors.RESET}")
+    def _query(self, sql, params=()):
+        with self.lock:
+            return [dict((key, row[key]) for key in row.keys() if row[key] is not None)
+                    for row in self.conn.execute(sql, params)]
+    
+    def add(self, entry):
+        """Append one history entry (a dict shaped like the old JSON entries)"""
+        values = [entry.get(column) for column in self.HISTORY_COLUMNS]
+        values[1] = values[1] or datetime.now().isoformat()
+        if values[7] is not None:
+            values[7] = int(bool(values[7]))
+        self._execute(f"INSERT INTO history ({', '.join(self.HISTORY_COLUMNS)}) "
+                      f"VALUES ({', '.join('?' * len(self.HISTORY_COLUMNS))})", values)
+    
+    def add_search(self, query, engine, results):
+        self.add({'type': 'search', 'query': query, 'engine': engine, 'results': results})
+    
+    def add_visit(self, url, title, tor=False):
+        self.add({'type': 'visit', 'url': url, 'title': title, 'tor': tor})
+    
+    def recent(self, limit=15, entry_type=None):
+        """Newest entries first (by timestamp: imported rows have later ids than their age)"""
+        if entry_type:
+            return self._query("SELECT * FROM history WHERE type = ? ORDER BY timestamp DESC, id DESC LIMIT ?",
+                               (entry_type, limit))
+        return self._query("SELECT * FROM history ORDER BY timestamp DESC, id DESC LIMIT ?", (limit,))
+    
+    def count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+    
+    def clear_history(self):
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM history")
+                self.conn.execute("DELETE FROM pages")
+    
+    def index_page(self, url, title, content):
+        """Keep the latest extracted text of a visited page searchable"""
+        self._execute("""
+            INSERT INTO pages (url, title, content, visited) VALUES (?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET title = excluded.title, content = excluded.content,
+                visited = excluded.visited, visits = visits + 1
+        """, (url, title, content, datetime.now().isoformat()))
+    
+    def find(self, terms, limit=15):
+        """Visited pages matching all terms, best match first"""
+        words = [word for word in re.findall(r'\w+', terms.lower()) if word]
+        if not words:
             return []
         
-        print(f"{Colors.INFO}{self.state.get_icon('INFO')} Searching {engine_config['name']} for: {query}{Colors.RESET}")
+        if self.fts:
+            # Quoted words can't break the query syntax; the last one may be unfinished
+            match = ' '.join(f'"{word}"' for word in words[:-1]) + f' "{words[-1]}"*'
+            return self._query("""
+                SELECT pages.url, pages.title, pages.visited, pages.visits,
+                       snippet(pages_fts, 1, char(2), char(3), '...', 12) AS snippet
+                FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid
+                WHERE pages_fts MATCH ?
+                ORDER BY bm25(pages_fts, 10.0, 1.0)
+                LIMIT ?
+            """, (match, limit))
         
+        where = ' AND '.join("(title LIKE ? OR content LIKE ?)" for _ in words)
+        params = [pattern for word in words for pattern in (f"%{word}%", f"%{word}%")]
+        rows = self._query(f"SELECT url, title, visited, visits, content FROM pages WHERE {where} "
+                           f"ORDER BY visited DESC LIMIT ?", params + [limit])
+        for row in rows:
+            content = row.pop('content', '')
+            position = max(content.lower().find(words[0]), 0)
+            row['snippet'] = content[max(position - 40, 0):position + 80]
+        return rows
+    
+    def add_bookmark(self, title, url):
+        self._execute("INSERT INTO bookmarks (title, url, added) VALUES (?, ?, ?)",
+                      (title, url, datetime.now().isoformat()))
+    
+    def bookmarks(self):
+        return self._query("SELECT title, url, added FROM bookmarks ORDER BY id")
+    
+    def bookmark_count(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM bookmarks").fetchone()[0]
+    
+    def clear_bookmarks(self):
+        self._execute("DELETE FROM bookmarks")
+    
+    def import_legacy(self, history, bookmarks):
+        """Copy entries from the old JSON data file in one transaction"""
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    f"INSERT INTO history ({', '.join(self.HISTORY_COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.HISTORY_COLUMNS))})",
+                    [[entry.get(column) for column in self.HISTORY_COLUMNS]
+                     for entry in sorted(history, key=lambda entry: entry.get('timestamp') or '')
+                     if entry.get('type') and entry.get('timestamp')])
+                self.conn.executemany(
+                    "INSERT INTO bookmarks (title, url, added) VALUES (?, ?, ?)",
+                    [(bm.get('title', ''), bm['url'], bm.get('added', datetime.now().isoformat()))
+                     for bm in bookmarks if bm.get('url')])
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ==================== SESSIONS ====================
+class SessionStore:
+    """Named snapshots of results and the open page, compressed on disk.
+    
+    Snapshots are JSON compressed with zstd when the zstandard package is
+    installed, gzip otherwise; either format can be read back as long as
+    its codec is available.
+    """
+    
+    VERSION = 1
+    
+    def __init__(self, sessions_dir):
+        self.sessions_dir = sessions_dir
+    
+    @staticmethod
+    def _codecs():
+        """{extension: (compress, decompress)} for the codecs available here"""
+        import gzip
+        codecs = {}
         try:
-            # Check exit flag
-            check_exit_flag()
-            
-            params = {}
-            for key, value in engine_config["params"].items():
-                params[key] = value.format(query=quote(query))
-            
-            use_tor = engine_config["requires_tor"] and self.state.tor_enabled
-            
-            # Build URL with parameters
-            url = engine_config["url"]
-            if params:
-                url += '?' + '&'.join([f"{k}={v}" for k, v in params.items()])
-            
-            response = self.network.get(url, use_tor=use_tor)
-            
-            # Check exit flag
-            check_exit_flag()
-            
-            # Check for CAPTCHA
-            if self._check_captcha(response.text):
-                print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} CAPTCHA detected! Switching to alternative engine...{Colors.RESET}")
-                return self._fallback_search(query, engine)
-            
-            results = self.parse_results(response, engine, query)
-            
-            self.state.history.append({
-                'type': 'search',
-                'query': query,
-                'engine': engine,
-                'timestamp': datetime.now().isoformat(),
-                'results': len(results)
-            })
-            
-            self.state.save_data()
-            self.state.current_results = results
-            return results
-            
-        except KeyboardInterrupt:
-            raise
-        except Exception as e:
-            print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} Search failed: {e}{Colors.RESET}")
-            return self._fallback_search(query, engine)
+            import zstandard
+            codecs['zst'] = (zstandard.ZstdCompressor(level=10).compress,
+                             lambda data: zstandard.ZstdDecompressor().decompress(data))
+        except ImportError:
+            pass
+        codecs['gz'] = (lambda data: gzip.compress(data, compresslevel=6), gzip.decompress)
+        return codecs
     
-    def _check_captcha(self, html):
-        """Check if the response contains CAPTCHA"""
-        captcha_indicators = [
-            "captcha", "CAPTCHA", "challenge", "duck", "squares",
-            "Please complete", "confirm you are human", "bot detection"
-        ]
-        
-        for indicator in captcha_indicators:
-            if indicator.lower() in html.lower():
-                return True
-        return False
+    @staticmethod
+    def clean_name(name):
+        return re.sub(r'[^\w.-]+', '_', name.strip())[:60].strip('._')
     
-    def _fallback_search(self, query, failed_engine):
-        """Try alternative search engines when one fails"""
-        alternatives = {
-            'ddg': ['brave', 'google', 'ddg_api'],
-            'google': ['brave', 'ddg_api', 'wikipedia'],
-            'brave': ['google', 'ddg_api', 'wikipedia'],
-            'ddg_api': ['brave', 'google', 'wikipedia'],
-            'wikipedia': ['brave', 'google', 'ddg_api']
-        }
+    def _path(self, name, extension):
+        return os.path.join(self.sessions_dir, f"{name}.session.{extension}")
+    
+    def save(self, name, snapshot):
+        """Write a snapshot atomically; returns (path, compressed size)"""
+        name = self.clean_name(name)
+        if not name:
+            raise ValueError("Session name must contain letters or digits")
         
-        if failed_engine in alternatives:
-            for alt_engine in alternatives[failed_engine]:
-                if SEARCH_ENGINES[alt_engine]['enabled']:
-                    print(f"{Colors.INFO}{self.state.get_icon('INFO')} Trying {SEARCH_ENGINES[alt_engine]['name']}...{Colors.RESET}")
-                    try:
-                        return self.search(query, alt_engine)
-                    except KeyboardInterrupt:
-                        raise
-                    except:
-                        continue
+        codecs = self._codecs()
+        extension = next(iter(codecs))
+        snapshot = dict(snapshot, version=self.VERSION, name=name, saved=datetime.now().isoformat())
+        data = codecs[extension][0](json.dumps(snapshot, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
         
-        # Last resort: return empty results with suggestion
-        print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} All search engines failed. Try enabling Tor or use a different network.{Colors.RESET}")
-        return []
-    
-    def parse_results(self, response, engine, query):
-        """Simple parsing without BeautifulSoup"""
-        results = []
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        path = self._path(name, extension)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
         
+        # A session saved earlier with the other codec would shadow this one
+        for other in codecs.keys() | {'zst', 'gz'}:
+            if other != extension and os.path.exists(self._path(name, other)):
+                os.remove(self._path(name, other))
+        return path, len(data)
+    
+    def load(self, name):
+        name = self.clean_name(name)
+        codecs = self._codecs()
+        for extension in ('zst', 'gz'):
+            path = self._path(name, extension)
+            if not os.path.exists(path):
+                continue
+            if extension not in codecs:
+                raise ValueError(f"Session '{name}' is zstd compressed: pip install zstandard")
+            with open(path, 'rb') as f:
+                return json.loads(codecs[extension][1](f.read()).decode('utf-8'))
+        return None
+    
+    def list_sessions(self):
+        """[(name, saved timestamp, size)] newest first"""
+        sessions = []
+        if not os.path.isdir(self.sessions_dir):
+            return sessions
+        for file_name in os.listdir(self.sessions_dir):
+            name, dot, extension = file_name.rpartition('.session.')
+            if dot and extension in ('zst', 'gz'):
+                stat = os.stat(os.path.join(self.sessions_dir, file_name))
+                sessions.append((name, stat.st_mtime, stat.st_size))
+        return sorted(sessions, key=lambda session: -session[1])
+    
+    def delete(self, name):
+        name = self.clean_name(name)
+        removed = False
+        for extension in ('zst', 'gz'):
+            path = self._path(name, extension)
+            if os.path.exists(path):
+                os.remove(path)
+                removed = True
+        return removed
+
+# ==================== PAGE ARCHIVE ====================
+class PageArchive:
+    """Offline copies of visited pages in a content-addressed blob store.
+    
+    Raw bodies and extracted text are stored once per SHA-256 digest under
+    blobs/ab/abcdef..., gzip compressed, so the same page reached through
+    several URLs (mirrors, tracking parameters, redirects) costs one copy.
+    A small SQLite index maps URLs to digests; when the blobs outgrow the
+    quota, the least recently opened pages are dropped (bookmarked pages
+    last) along with any blob no page refers to any more.
+    """
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            url TEXT PRIMARY KEY,
+            body_hash TEXT,
+            text_hash TEXT NOT NULL,
+            content_type TEXT,
+            archived TEXT NOT NULL,
+            last_access REAL NOT NULL,
+            pinned INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_pages_body ON pages(body_hash);
+        CREATE INDEX IF NOT EXISTS idx_pages_text ON pages(text_hash);
+        CREATE INDEX IF NOT EXISTS idx_pages_access ON pages(pinned, last_access);
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            size INTEGER NOT NULL
+        );
+    """
+    
+    def __init__(self, archive_dir, max_bytes=256 * 1024 * 1024):
+        import sqlite3
+        self.archive_dir = archive_dir
+        self.blob_dir = os.path.join(archive_dir, "blobs")
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+        # Prefetch jobs archive pages from worker threads
+        self.conn = sqlite3.connect(os.path.join(archive_dir, "index.db"), check_same_thread=False)
         try:
-            # Check exit flag
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+        except sqlite3.DatabaseError:
+            pass
+        self.conn.executescript(self.SCHEMA)
+        self.conn.commit()
+    
+    def _blob_path(self, digest):
+        return os.path.join(self.blob_dir, digest[:2], digest)
+    
+    def _put_blob(self, data):
+        """Store data under its SHA-256 unless it is already there (lock must be held)"""
+        import gzip
+        import hashlib
+        digest = hashlib.sha256(data).hexdigest()
+        if self.conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+            return digest
+        
+        path = self._blob_path(digest)
+        compressed = gzip.compress(data, compresslevel=6)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_file = path + ".tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_file, path)
+        self.conn.execute("INSERT OR REPLACE INTO blobs (hash, size) VALUES (?, ?)", (digest, len(compressed)))
+        return digest
+    
+    def _read_blob(self, digest):
+        import gzip
+        with open(self._blob_path(digest), 'rb') as f:
+            return gzip.decompress(f.read())
+    
+    def put(self, url, page, body=None, content_type=''):
+        """Archive a fetched page: its raw body and the extracted text"""
+        text = json.dumps({key: page.get(key) for key in ('title', 'content', 'headings', 'links')},
+                          ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        with self.lock:
+            previous = self.conn.execute("SELECT body_hash, text_hash FROM pages WHERE url = ?", (url,)).fetchone()
+            body_hash = self._put_blob(body) if body else None
+            text_hash = self._put_blob(text)
+            self.conn.execute(
+                """INSERT INTO pages (url, body_hash, text_hash, content_type, archived, last_access)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(url) DO UPDATE SET body_hash = excluded.body_hash,
+                       text_hash = excluded.text_hash, content_type = excluded.content_type,
+                       archived = excluded.archived, last_access = excluded.last_access""",
+                (url, body_hash, text_hash, content_type, datetime.now().isoformat(), time.time()))
+            if previous:
+                # The page changed since it was archived
+                self._collect(previous)
+            self._evict()
+            self.conn.commit()
+    
+    def get(self, url):
+        """The archived page for url in fetch_page() form, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT text_hash, archived FROM pages WHERE url = ?", (url,)).fetchone()
+            if not row:
+                return None
+            try:
+                extracted = json.loads(self._read_blob(row[0]).decode('utf-8'))
+            except (OSError, ValueError):
+                # Blob lost or damaged: forget the page rather than fail every time
+                self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                self._collect((row[0],))
+                self.conn.commit()
+                return None
+            self.conn.execute("UPDATE pages SET last_access = ? WHERE url = ?", (time.time(), url))
+            self.conn.commit()
+        
+        return {
+            'success': True,
+            'url': url,
+            'title': extracted.get('title') or url,
+            'content': extracted.get('content') or '',
+            'headings': extracted.get('headings') or [],
+            'links': extracted.get('links') or [],
+            'tor': False,
+            'archived': row[1]
+        }
+    
+    def body(self, url):
+        """(raw body bytes, content type) as downloaded, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT body_hash, content_type FROM pages WHERE url = ?", (url,)).fetchone()
+        if not row or not row[0]:
+            return None
+        return self._read_blob(row[0]), row[1]
+    
+    def archived(self, urls):
+        """The subset of urls that have an archived copy"""
+        urls = list(urls)
+        found = set()
+        with self.lock:
+            # Stay under SQLite's bound-parameter limit
+            for start in range(0, len(urls), 500):
+                batch = urls[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                found.update(row[0] for row in self.conn.execute(
+                    f"SELECT url FROM pages WHERE url IN ({placeholders})", batch))
+        return found
+    
+    def pin(self, url, pinned=True):
+        """Keep a page (e.g. a bookmark) until nothing else is left to evict"""
+        with self.lock:
+            self.conn.execute("UPDATE pages SET pinned = ? WHERE url = ?", (int(pinned), url))
+            self.conn.commit()
+    
+    def _collect(self, digests=None):
+        """Delete blobs no page refers to, checking only digests if given (lock must be held)"""
+        if digests is None:
+            digests = [row[0] for row in self.conn.execute("SELECT hash FROM blobs")]
+        orphans = [digest for digest in set(digests) if digest and not self.conn.execute(
+            "SELECT 1 FROM pages WHERE body_hash = ? OR text_hash = ? LIMIT 1", (digest, digest)).fetchone()]
+        for digest in orphans:
+            self.conn.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+        return len(orphans)
+    
+    def _evict(self):
+        """Drop least recently opened pages until under max_bytes (lock must be held)"""
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        candidates = self.conn.execute(
+            "SELECT url, body_hash, text_hash FROM pages ORDER BY pinned, last_access").fetchall()
+        for url, body_hash, text_hash in candidates:
+            # A blob shared with another page stays, so re-measure after each drop
+            self.conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._collect((body_hash, text_hash))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            if total <= self.max_bytes:
+                break
+    
+    def stats(self):
+        with self.lock:
+            pages, pinned = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(pinned), 0) FROM pages").fetchone()
+            blobs, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs").fetchone()
+        return {'pages': pages, 'pinned': pinned, 'blobs': blobs, 'bytes': size, 'max_bytes': self.max_bytes}
+    
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM pages")
+            self._collect()
+            self.conn.commit()
+    
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+# ==================== RESULT CACHE ====================
+class ResultCache:
+    """Persistent (engine, query) -> results cache with TTL and LRU eviction"""
+    
+    def __init__(self, cache_file, max_entries=1000):
+        from collections import OrderedDict
+        self.cache_file = cache_file
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.dirty = False
+        self.loaded = False
+        self.lock = threading.Lock()
+        
+        atexit.register(self.save)
+    
+    @staticmethod
+    def make_key(engine, query):
+        """Cache key for an engine and a normalized query"""
+        return f"{engine}:{' '.join(query.lower().split())}"
+    
+    def get(self, engine, query, ttl):
+        """Return the cached value or None if missing or older than ttl seconds"""
+        key = self.make_key(engine, query)
+        with self.lock:
+            self._ensure_loaded()
+            entry = self.entries.get(key)
+            if entry is None or time.time() - entry['time'] > ttl:
+                if entry is not None:
+                    del self.entries[key]
+                    self.dirty = True
+                self.misses += 1
+                return None
+            
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry['value']
+    
+    def put(self, engine, query, value):
+        key = self.make_key(engine, query)
+        with self.lock:
+            self._ensure_loaded()
+            self.entries[key] = {'time': time.time(), 'value': value}
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            self.dirty = True
+    
+    def clear(self):
+        with self.lock:
+            self.loaded = True
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.dirty = True
+        self.save()
+    
+    def stats(self):
+        with self.lock:
+            self._ensure_loaded()
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+    
+    def _ensure_loaded(self):
+        """Read the cache file on first use instead of at startup (lock must be held)"""
+        if not self.loaded:
+            self.loaded = True
+            self.load()
+    
+    def load(self):
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r', encoding='utf-8') as f:
+                    # Stored oldest first, so file order is LRU order
+                    for key, entry in json.load(f).get('entries', []):
+                        self.entries[key] = entry
+            except:
+                pass
+    
+    def save(self):
+        with self.lock:
+            if not self.dirty:
+                return
+            data = {'entries': list(self.entries.items())}
+            self.dirty = False
+        
+        try:
+            tmp_file = self.cache_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_file, self.cache_file)
+        except:
+            pass
+
+# ==================== HTTP CACHE ====================
+class HttpCache:
+    """On-disk HTTP response cache with ETag/Last-Modified revalidation"""
+    
+    def __init__(self, cache_dir, max_bytes=50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.max_bytes = max_bytes
+        self.index = None
+        self.lock = threading.Lock()
+    
+    def _ensure_loaded(self):
+        """Read the index on first use instead of at startup (lock must be held)"""
+        if self.index is not None:
+            return
+        self.index = {}
+        if os.path.exists(self.index_file):
+            try:
+                with open(self.index_file, 'r', encoding='utf-8') as f:
+                    self.index = json.load(f)
+            except:
+                self.index = {}
+    
+    @staticmethod
+    def parse_cache_control(value):
+        """Parse a Cache-Control header into a dict of directives"""
+        directives = {}
+        for part in (value or "").lower().split(','):
+            name, _, arg = part.strip().partition('=')
+            if name:
+                directives[name] = arg.strip('"')
+        return directives
+    
+    def lookup(self, url):
+        with self.lock:
+            self._ensure_loaded()
+            meta = self.index.get(url)
+            if meta and not os.path.exists(os.path.join(self.cache_dir, meta['file'])):
+                del self.index[url]
+                return None
+            return meta
+    
+    def is_fresh(self, meta):
+        """True if max-age has not expired yet, so no request is needed"""
+        return time.time() - meta['stored'] < meta.get('max_age', 0)
+    
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+    
+    def _max_age(self, response):
+        directives = self.parse_cache_control(response.headers.get('cache-control'))
+        if 'no-cache' in directives:
+            return 0
+        try:
+            return max(0, int(directives.get('max-age', 0)))
+        except ValueError:
+            return 0
+    
+    def store(self, url, response, body=None):
+        """Save a 200 response if it can be reused or revalidated later (body must be complete)"""
+        directives = self.parse_cache_control(response.headers.get('cache-control'))
+        etag = response.headers.get('etag')
+        last_modified = response.headers.get('last-modified')
+        max_age = self._max_age(response)
+        
+        if response.status_code != 200 or 'no-store' in directives:
+            return
+        if not (etag or last_modified or max_age):
+            return
+        
+        import hashlib
+        file_name = hashlib.sha256(url.encode('utf-8')).hexdigest() + ".body"
+        if body is None:
+            body = response.content
+        
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(os.path.join(self.cache_dir, file_name), 'wb') as f:
+                f.write(body)
+        except:
+            return
+        
+        with self.lock:
+            self._ensure_loaded()
+            self.index[url] = {
+                'file': file_name,
+                'size': len(body),
+                'url': response.url,
+                'etag': etag,
+                'last_modified': last_modified,
+                'max_age': max_age,
+                'stored': time.time(),
+                'content_type': response.headers.get('content-type', ''),
+                'encoding': response.encoding
+            }
+            self._evict()
+            self._save_index()
+    
+    def refresh(self, url, response):
+        """Mark an entry as fresh again after a 304 Not Modified"""
+        with self.lock:
+            self._ensure_loaded()
+            meta = self.index.get(url)
+            if not meta:
+                return
+            meta['stored'] = time.time()
+            if 'cache-control' in response.headers:
+                meta['max_age'] = self._max_age(response)
+            meta['etag'] = response.headers.get('etag', meta.get('etag'))
+            self._save_index()
+    
+    def build_response(self, url, meta):
+        """Recreate a response object from a cached entry"""
+        import requests
+        from requests.structures import CaseInsensitiveDict
+        
+        with open(os.path.join(self.cache_dir, meta['file']), 'rb') as f:
+            body = f.read()
+        
+        response = requests.models.Response()
+        response._content = body
+        response._content_consumed = True
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = meta.get('url', url)
+        response.encoding = meta.get('encoding')
+        response.headers = CaseInsensitiveDict({'content-type': meta.get('content_type', '')})
+        response.from_cache = True
+        return response
+    
+    def _evict(self):
+        """Drop oldest entries until under max_bytes (lock must be held)"""
+        total = sum(meta['size'] for meta in self.index.values())
+        for url in sorted(self.index, key=lambda u: self.index[u]['stored']):
+            if total <= self.max_bytes:
+                break
+            meta = self.index.pop(url)
+            total -= meta['size']
+            try:
+                os.remove(os.path.join(self.cache_dir, meta['file']))
+            except OSError:
+                pass
+    
+    def _save_index(self):
+        try:
+            tmp_file = self.index_file + ".tmp"
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(tmp_file, self.index_file)
+        except:
+            pass
+
+# ==================== TRANSPORT ====================
+def create_session():
+    """Build the HTTP session shared by search, page loads and NavAI"""
+    if TRANSPORT['client'] == "httpx":
+        try:
+            return HttpxSession()
+        except ImportError:
+            print(f"{Colors.WARNING}⚠️  httpx not installed, falling back to requests{Colors.RESET}")
+    
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    
+    retry = Retry(
+        total=TRANSPORT['retries'],
+        backoff_factor=TRANSPORT['backoff_factor'],
+        status_forcelist=TRANSPORT['retry_statuses'],
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=TRANSPORT['pool_connections'],
+        pool_maxsize=TRANSPORT['pool_maxsize'],
+        max_retries=retry
+    )
+    
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT})
+    return session
+
+class HttpxResponse:
+    """Gives an httpx response the parts of the requests API we use"""
+    
+    def __init__(self, response):
+        self.raw = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.url = str(response.url)
+        self.history = response.history
+        self.encoding = response.encoding
+    
+    @property
+    def content(self):
+        return self.raw.read()
+    
+    @property
+    def text(self):
+        self.raw.read()
+        return self.raw.text
+    
+    def json(self):
+        self.raw.read()
+        return self.raw.json()
+    
+    def iter_content(self, chunk_size=None):
+        return self.raw.iter_bytes(chunk_size)
+    
+    def raise_for_status(self):
+        self.raw.raise_for_status()
+    
+    def close(self):
+        self.raw.close()
+
+class HttpxSession:
+    """requests.Session look-alike on top of an HTTP/2 capable httpx.Client"""
+    
+    def __init__(self):
+        import httpx
+        self.httpx = httpx
+        self.client = httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            headers={'User-Agent': USER_AGENT},
+            limits=httpx.Limits(
+                max_connections=TRANSPORT['pool_connections'] * TRANSPORT['pool_maxsize'],
+                max_keepalive_connections=TRANSPORT['pool_maxsize']
+            ),
+            transport=httpx.HTTPTransport(http2=True, retries=TRANSPORT['retries'])
+        )
+        self.proxy_session = None
+    
+    @property
+    def headers(self):
+        return self.client.headers
+    
+    def get(self, url, params=None, headers=None, proxies=None, timeout=10, stream=False):
+        if proxies:
+            # httpx binds proxies per client; Tor traffic goes through requests
+            if self.proxy_session is None:
+                import requests
+                self.proxy_session = requests.Session()
+                self.proxy_session.headers.update({'User-Agent': USER_AGENT})
+            return self.proxy_session.get(url, params=params, headers=headers, proxies=proxies,
+                                          timeout=timeout, stream=stream)
+        
+        request = self.client.build_request("GET", url, params=params, headers=headers, timeout=timeout)
+        return HttpxResponse(self.client.send(request, stream=stream))
+
+# ==================== RATE LIMITER ====================
+class TokenBucket:
+    """Token bucket for a single host"""
+    
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(burst))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self):
+        """Take a token and return how many seconds to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            # Going negative queues callers in arrival order
+            return -self.tokens / self.rate
+
+class RateLimiter:
+    """Per-host rate limiting - hosts without a configured limit are never delayed"""
+    
+    def __init__(self):
+        self.buckets = {}
+        self.lock = threading.Lock()
+    
+    def configure(self, host, rate, burst=1):
+        with self.lock:
+            if rate and rate > 0:
+                self.buckets[host] = TokenBucket(rate, burst)
+            else:
+                self.buckets.pop(host, None)
+    
+    def configure_engines(self):
+        """Set up buckets from the rate_limit of every SEARCH_ENGINES entry"""
+        for config in SEARCH_ENGINES.values():
+            limit = config.get('rate_limit') or {}
+            host = urlparse(config['url']).hostname
+            if host:
+                self.configure(host, limit.get('rate', 0), limit.get('burst', 1))
+    
+    def acquire(self, url):
+        """Wait until a request to url's host is allowed"""
+        bucket = self.buckets.get(urlparse(url).hostname)
+        if bucket is None:
+            return
+        
+        # Only this caller sleeps, so other hosts proceed concurrently
+        end_time = time.monotonic() + bucket.reserve()
+        while True:
             check_exit_flag()
+            remaining = end_time - time.monotonic()
+            if remaining <= 0:
+                return
+            time.sleep(min(remaining, 0.1))
+
+# ==================== NETWORK MANAGER ====================
+class NetworkManager:
+    def __init__(self, state):
+        self.state = state
+        self.rate_limiter = RateLimiter()
+        self.rate_limiter.configure_engines()
+        self.http_cache = HttpCache(state.http_cache_dir)
+        self._session = None
+        self.session_lock = threading.Lock()
+    
+    @property
+    def session(self):
+        """The shared HTTP session, built on first use (importing requests takes ~100 ms)"""
+        if self._session is None:
+            with self.session_lock:
+                if self._session is None:
+                    try:
+                        with PROFILER.span("net.session"):
+                            self._session = create_session()
+                    except ImportError:
+                        print(f"{Colors.ERROR}❌ requests library not installed!{Colors.RESET}")
+                        print(f"{Colors.INFO}Install with: pip install requests{Colors.RESET}")
+                        sys.exit(1)
+        return self._session
+    
+    def get(self, url, use_tor=False, timeout=10, use_cache=False, stream=False, detector=None):
+        """Fetch url; a CaptchaDetector passed as detector raises CaptchaError
+        on a bot check status or redirect before the status is raised for"""
+        with PROFILER.span("net.get", host=urlparse(url).hostname, tor=use_tor) as span:
+            return self._get(url, use_tor, timeout, use_cache, stream, span, detector)
+    
+    def _get(self, url, use_tor, timeout, use_cache, stream, span, detector):
+        try:
+            # Never keep Tor traffic on disk
+            cached = self.http_cache.lookup(url) if use_cache and not use_tor else None
+            if cached and self.http_cache.is_fresh(cached):
+                span.set(cache="fresh")
+                return self.http_cache.build_response(url, cached)
             
-            if engine == "ddg":
-                # Parse DuckDuckGo HTML version
-                html = response.text
-                
-                # Extract results from DDG HTML
-                # DDG HTML has results in <a class="result__url" ...> format
-                pattern = r'<a[^>]*class="[^"]*result__url[^"]*"[^>]*href="([^"]+)"[^>]*>.*?<a[^>]*class="[^"]*result__title[^"]*"[^>]*>([^<]+)</a>'
-                matches = re.findall(pattern, html, re.DOTALL)
-                
-                for url, title in matches[:10]:
-                    if 'duckduckgo.com' not in url:
-                        # Clean title
-                        title = re.sub(r'<[^>]+>', '', title).strip()
-                        results.append({
-                            'title': title[:80],
-                            'url': url,
-                            'snippet': f"Result from DuckDuckGo for: {query}",
-                            'engine': 'DuckDuckGo'
-                        })
+            # Throttle hosts that need it (search engines) to avoid CAPTCHA
+            with PROFILER.span("net.rate_limit"):
+                self.rate_limiter.acquire(url)
+            
+            # Check exit flag
+            check_exit_flag()
+            
+            proxies = self.get_tor_proxies() if use_tor else None
+            headers = self.http_cache.conditional_headers(cached) if cached else None
+            with PROFILER.span("net.request") as request_span:
+                connections = self._pool_connections(url) if PROFILER.enabled and not proxies else None
+                response = self.session.get(url, proxies=proxies, timeout=timeout, headers=headers, stream=stream)
+                # Connect (DNS + TCP + TLS) only happens when the pool had to open a connection
+                if connections is not None:
+                    request_span.set(new_connection=self._pool_connections(url) != connections)
+                request_span.set(status=response.status_code)
+            
+            if cached and response.status_code == 304:
+                span.set(cache="revalidated")
+                self.http_cache.refresh(url, response)
+                return self.http_cache.build_response(url, cached)
+            
+            # Bot check pages often come with an error status (Google's /sorry/ is a 429)
+            if detector is not None and detector.check_response(response):
+                response.close()
+                raise CaptchaError(f"CAPTCHA detected at {url}")
+            
+            response.raise_for_status()
+            
+            # Check exit flag
+            check_exit_flag()
+            
+            # Streamed bodies are stored by the caller once read
+            if use_cache and not use_tor and not stream:
+                self.http_cache.store(url, response)
+            
+            return response
+        except (KeyboardInterrupt, CaptchaError):
+            raise
+        except Exception as e:
+            raise Exception(f"Failed to fetch {url}: {e}")
+    
+    def _pool_connections(self, url):
+        """Connections opened so far by the pools serving url's scheme (None if unknown)"""
+        try:
+            pools = self.session.get_adapter(url).poolmanager.pools
+            return sum(pools[key].num_connections for key in pools.keys())
+        except Exception:
+            return None
+    
+    def get_tor_proxies(self):
+        if self.state.tor_enabled:
+            return {
+                'http': 'socks5h://127.0.0.1:9050',
+                'https': 'socks5h://127.0.0.1:9050'
+            }
+        return None
+
+# ==================== CAPTCHA DETECTION ====================
+CAPTCHA_COMMON_MARKERS = ["g-recaptcha", "h-captcha", "cf-challenge", "captcha-delivery.com"]
+
+class CaptchaError(Exception):
+    """An engine answered with a CAPTCHA instead of results"""
+
+class CaptchaDetector:
+    """Scans a body for an engine's bot check signatures.
+    
+    Each chunk is lowercased once and searched for the engine's specific
+    markers, and feed() can be called on streamed chunks to stop reading
+    early. (A compiled case-insensitive alternation was measured at over
+    20x slower than this in CPython's re.)
+    """
+    
+    def __init__(self, engine=None):
+        self.config = SEARCH_ENGINES.get(engine, {}).get('captcha', {})
+        self.markers = [m.lower() for m in CAPTCHA_COMMON_MARKERS + self.config.get('markers', [])]
+        self.overlap = max(len(m) for m in self.markers) - 1
+        self.tail = ""
+        self.detected = False
+    
+    def check_response(self, response):
+        """Check status code and redirect targets before reading the body"""
+        if response.status_code in self.config.get('status', []):
+            self.detected = True
+        
+        redirects = self.config.get('redirects', [])
+        if redirects:
+            locations = [response.url or ""] + [r.headers.get('location', '') for r in getattr(response, 'history', [])]
+            if any(marker in location for marker in redirects for location in locations):
+                self.detected = True
+        return self.detected
+    
+    def feed(self, chunk):
+        """Scan the next chunk, keeping a tail so split markers are still found"""
+        if self.detected:
+            return True
+        text = self.tail + chunk.lower()
+        if any(marker in text for marker in self.markers):
+            self.detected = True
+        self.tail = text[-self.overlap:]
+        return self.detected
+    
+    def check(self, text):
+        return self.feed(text)
+
+def response_decoder(response):
+    """Incremental decoder for a streamed response body"""
+    import codecs
+    
+    # requests assumes ISO-8859-1 when no charset is sent; the web is mostly UTF-8
+    content_type = response.headers.get('content-type', '').lower()
+    encoding = response.encoding if 'charset=' in content_type and response.encoding else 'utf-8'
+    try:
+        return codecs.getincrementaldecoder(encoding)(errors='replace')
+    except LookupError:
+        return codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+# ==================== RESULT PARSERS ====================
+RESULT_PARSERS = {}
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+def register_parser(engine):
+    """Class decorator that registers a ResultParser for a SEARCH_ENGINES key"""
+    def decorator(cls):
+        RESULT_PARSERS[engine] = cls()
+        return cls
+    return decorator
+
+def strip_tags(text):
+    return html_unescape(TAG_PATTERN.sub('', text)).strip()
+
+class ResultParser:
+    """Turns an engine's response body into result dicts.
+    
+    Subclasses compile their patterns once as class attributes and
+    extract everything in a single pass over the body.
+    """
+    
+    name = ""
+    
+    def parse(self, body, query):
+        raise NotImplementedError
+    
+    def result(self, title, url, snippet):
+        return {
+            'title': title[:80],
+            'url': url,
+            'snippet': snippet,
+            'engine': self.name
+        }
+
+@register_parser("ddg")
+class DuckDuckGoParser(ResultParser):
+    name = "DuckDuckGo"
+    
+    # Title links and snippets appear in document order, one pass picks up both
+    TOKEN_PATTERN = re.compile(
+        r'<a[^>]*class="[^"]*result__a[^"]*"[^>]*href="(?P<href>[^"]+)"[^>]*>(?P<title>.*?)</a>'
+        r'|<a[^>]*class="[^"]*result__snippet[^"]*"[^>]*>(?P<snippet>.*?)</a>',
+        re.DOTALL
+    )
+    LINK_PATTERN = re.compile(r'<a[^>]+href="([^"]+)"[^>]*>([^<]+)</a>')
+    
+    def parse(self, body, query):
+        results = []
+        last = None
+        for match in self.TOKEN_PATTERN.finditer(body):
+            if match.group('href'):
+                if len(results) >= 10:
+                    break
+                url = self._target_url(match.group('href'))
+                title = strip_tags(match.group('title'))
+                last = None
+                if url and title and 'duckduckgo.com' not in url:
+                    last = self.result(title, url, f"Result from DuckDuckGo for: {query}")
+                    results.append(last)
+            elif last is not None:
+                last['snippet'] = strip_tags(match.group('snippet'))[:120]
+                last = None
+        
+        if results:
+            return results
+        
+        # Layout changed? Take any reasonable outbound links
+        for url, title in self.LINK_PATTERN.findall(body)[:15]:
+            if 'duckduckgo.com' not in url and len(title) > 10:
+                results.append(self.result(
+                    strip_tags(title),
+                    url if url.startswith('http') else f"https:{url}" if url.startswith('//') else f"https://{url}",
+                    f"Search result for: {query}"
+                ))
+        return results
+    
+    def _target_url(self, href):
+        """Unwrap DuckDuckGo's /l/?uddg= redirect links"""
+        href = html_unescape(href)
+        if '/l/?' in href:
+            target = parse_qs(urlparse(href).query).get('uddg')
+            if target:
+                return target[0]
+        if href.startswith('//'):
+            return "https:" + href
+        return href
+
+@register_parser("ddg_api")
+class DuckDuckGoApiParser(ResultParser):
+    name = "DuckDuckGo API"
+    
+    def parse(self, body, query):
+        data = json.loads(body)
+        results = []
+        
+        # Get abstract/answer
+        if data.get("AbstractText"):
+            results.append({
+                'title': data.get("Heading", "Answer"),
+                'url': data.get("AbstractURL", f"https://duckduckgo.com/?q={quote(query)}"),
+                'snippet': data["AbstractText"][:150],
+                'engine': self.name
+            })
+        
+        # Get related topics
+        for topic in data.get("RelatedTopics", []):
+            if "Text" in topic and "FirstURL" in topic:
+                results.append(self.result(topic["Text"].split(" - ")[0], topic["FirstURL"], topic["Text"][:120]))
+        
+        # Get external links
+        for result in data.get("Results", []):
+            results.append(self.result(result.get("Text", "Result"), result.get("FirstURL", ""), result.get("Text", "")[:120]))
+        
+        return results
+
+@register_parser("wikipedia")
+class WikipediaParser(ResultParser):
+    name = "Wikipedia"
+    
+    def parse(self, body, query):
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return [{
+                'title': "View Wikipedia Search",
+                'url': f"https://en.wikipedia.org/wiki/Special:Search?search={quote(query)}",
+                'snippet': "Open Wikipedia search results",
+                'engine': self.name
+            }]
+        
+        results = []
+        if isinstance(data, list) and len(data) >= 4:
+            for title, snippet, url in zip(data[1], data[2], data[3]):
+                results.append({
+                    'title': title,
+                    'url': url,
+                    'snippet': snippet[:120],
+                    'engine': self.name
+                })
+        return results
+
+@register_parser("google")
+class GoogleParser(ResultParser):
+    name = "Google"
+    
+    # Result blocks, their first text link and the following snippet are
+    # picked up in one left-to-right scan instead of a snippet search per result
+    TOKEN_PATTERN = re.compile(
+        r'(?P<block><div[^>]*class="[^"]*g[^"]*"[^>]*>)'
+        r'|<a[^>]+href="(?P<href>[^"]+)"[^>]*>(?P<title>[^<]+)</a>'
+        r'|<div[^>]*class="[^"]*VwiC3b[^"]*"[^>]*>(?P<snippet>[^<]+)'
+    )
+    
+    def parse(self, body, query):
+        results = []
+        in_block = False
+        last = None
+        for match in self.TOKEN_PATTERN.finditer(body):
+            if match.group('block'):
+                in_block = True
+            elif match.group('href'):
+                if not in_block:
+                    continue
+                in_block = False
+                if len(results) >= 10:
+                    break
                 
-                # If no results found with first pattern, try alternative
-                if not results:
-                    # Try to find all links with snippets
-                    links = re.findall(r'<a[^>]+href="([^"]+)"[^>]*>([^<]+)</a>', html)
-                    for url, title in links[:15]:
-                        if 'duckduckgo.com' not in url and len(title) > 10:
-                            results.append({
-                                'title': re.sub(r'<[^>]+>', '', title).strip()[:80],
-                                'url': url if url.startswith('http') else f"https:{url}" if url.startswith('//') else f"https://{url}",
-                                'snippet': f"Search result for: {query}",
-                                'engine': 'DuckDuckGo'
-                            })
-            
-            elif engine == "ddg_api":
-                # Parse DuckDuckGo JSON API
-                data = response.json()
+                url = html_unescape(match.group('href'))
+                # Clean Google redirect URLs
+                if url.startswith('/url?'):
+                    target = parse_qs(urlparse(url).query).get('q')
+                    if target:
+                        url = target[0]
                 
+                title = strip_tags(match.group('title'))
+                if url and title and 'google.com' not in url:
+                    last = self.result(title, url, "")
+                    results.append(last)
+            elif last is not None and not last['snippet']:
+                last['snippet'] = strip_tags(match.group('snippet'))[:120]
+        return results
+
+@register_parser("brave")
+class BraveParser(ResultParser):
+    name = "Brave"
+    
+    RESULT_PATTERN = re.compile(
+        r'<a[^>]+data-testid="[^"]*result-title[^"]*"[^>]+href="([^"]+)"[^>]*>(.*?)</a>',
+        re.DOTALL
+    )
+    
+    def parse(self, body, query):
+        results = []
+        for url, title in self.RESULT_PATTERN.findall(body)[:10]:
+            if 'brave.com' not in url:
+                title = strip_tags(title)
+                if title:
+                    results.append(self.result(title, html_unescape(url), f"Result from Brave Search for: {query}"))
+        return results
+
+# ==================== RESULT FUSION ====================
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', 'ref', 'ref_src', 'srsltid', '_hsenc', '_hsmi'}
+# Engine redirect wrappers: (host suffix, path prefix, parameter holding the target)
+REDIRECT_WRAPPERS = [
+    ('google.com', '/url', ('q', 'url')),
+    ('duckduckgo.com', '/l/', ('uddg',)),
+    ('bing.com', '/ck/a', ('u',)),
+    ('search.brave.com', '/redirect', ('url',))
+]
+RRF_K = 60  # Rank damping from the reciprocal rank fusion paper; 60 is the usual choice
+
+def unwrap_redirect(url):
+    """Return the destination of an engine click-tracking URL, or the URL itself"""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    for suffix, path, params in REDIRECT_WRAPPERS:
+        if (host.endswith(suffix) or (not host and url.startswith(path))) and parsed.path.startswith(path):
+            query = parse_qs(parsed.query)
+            for param in params:
+                if query.get(param, [''])[0].startswith(('http://', 'https://')):
+                    return query[param][0]
+    return url
+
+def canonical_url(url):
+    """Key under which the same page found by different engines compares equal.
+    
+    Scheme, 'www.', default ports, fragments, trailing slashes, tracking
+    parameters and parameter order are ignored.
+    """
+    parsed = urlparse(unwrap_redirect(url.strip()))
+    host = parsed.hostname or ''
+    if host.startswith('www.'):
+        host = host[4:]
+    if parsed.port and parsed.port not in (80, 443):
+        host = f"{host}:{parsed.port}"
+    
+    path = unquote(parsed.path).rstrip('/')
+    params = sorted(
+        pair for pair in parsed.query.split('&')
+        if pair and not pair.split('=', 1)[0].lower().startswith('utm_')
+        and pair.split('=', 1)[0].lower() not in TRACKING_PARAMS
+    )
+    return f"{host}{path}?{'&'.join(params)}" if params else f"{host}{path}"
+
+@profiled("search.fuse")
+def fuse_results(ranked_lists, limit=None, weights=None):
+    """Merge per-engine result lists into one deduplicated, ranked list.
+    
+    Each result scores sum(weight / (RRF_K + rank)) over the lists it
+    appears in, so pages several engines agree on rise to the top. One
+    pass over all results with a dict keyed by canonical_url; duplicates
+    keep the first copy and gain the other engines' names and snippets.
+    """
+    import heapq
+    
+    fused = {}
+    order = []
+    for list_index, results in enumerate(ranked_lists):
+        weight = (weights or {}).get(list_index, 1.0)
+        for rank, result in enumerate(results, 1):
+            url = result.get('url')
+            if not url:
+                continue
+            key = canonical_url(url)
+            entry = fused.get(key)
+            
+            if entry is None:
+                entry = dict(result)
+                entry['url'] = unwrap_redirect(url)
+                entry['engines'] = [result.get('engine', '')]
+                entry['score'] = 0.0
+                entry['_lists'] = set()
+                fused[key] = entry
+                order.append(entry)
+            else:
+                engine = result.get('engine', '')
+                if engine not in entry['engines']:
+                    entry['engines'].append(engine)
+                if len(result.get('snippet') or '') > len(entry.get('snippet') or ''):
+                    entry['snippet'] = result['snippet']
+                if entry['url'].startswith('http://') and url.startswith('https://'):
+                    entry['url'] = url
+            
+            # Only an engine's best rank for a page counts
+            if list_index not in entry['_lists']:
+                entry['_lists'].add(list_index)
+                entry['score'] += weight / (RRF_K + rank)
+    
+    for entry in order:
+        del entry['_lists']
+        entry['score'] = round(entry['score'], 6)
+    
+    if limit is not None:
+        return heapq.nlargest(limit, order, key=lambda entry: entry['score'])
+    # sorted() is stable, so ties keep first-seen order
+    return sorted(order, key=lambda entry: -entry['score'])
+
+# ==================== ENGINE HEALTH ====================
+class EngineHealth:
+    """Rolling per-engine latency, error and CAPTCHA stats with circuit breakers.
+    
+    Each engine keeps its last HEALTH['window'] outcomes. Enough
+    consecutive failures, or a single CAPTCHA, open the engine's circuit
+    and it is skipped until the cool-down ends; the next request is then
+    a trial that closes or re-opens it. Stats survive restarts.
+    """
+    
+    OUTCOMES = ('ok', 'error', 'captcha')
+    
+    def __init__(self, health_file=None):
+        self.health_file = health_file
+        self.samples = {}        # engine -> [[time, latency, outcome], ...]
+        self.open_until = {}     # engine -> wall clock time the circuit closes
+        self.failures = {}       # engine -> consecutive failures
+        self.lock = threading.Lock()
+        
+        if health_file:
+            self.load()
+            atexit.register(self.save)
+    
+    def record(self, engine, outcome, latency):
+        with self.lock:
+            samples = self.samples.setdefault(engine, [])
+            samples.append([time.time(), round(latency, 3), outcome])
+            del samples[:-HEALTH['window']]
+            
+            if outcome == 'ok':
+                self.failures[engine] = 0
+                self.open_until.pop(engine, None)
+                return
+            
+            self.failures[engine] = self.failures.get(engine, 0) + 1
+            if outcome == 'captcha':
+                self.open_until[engine] = time.time() + HEALTH['captcha_cooldown']
+            elif self.failures[engine] >= HEALTH['failure_threshold']:
+                self.open_until[engine] = time.time() + HEALTH['cooldown']
+    
+    def available(self, engine):
+        """False while the engine's circuit is open"""
+        with self.lock:
+            return self.open_until.get(engine, 0) <= time.time()
+    
+    def percentile(self, engine, fraction, outcome='ok'):
+        """Latency percentile of recent requests, or None without data"""
+        with self.lock:
+            latencies = sorted(s[1] for s in self.samples.get(engine, []) if s[2] == outcome)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+    
+    def stats(self, engine):
+        with self.lock:
+            samples = list(self.samples.get(engine, []))
+            reopen = self.open_until.get(engine, 0) - time.time()
+        total = len(samples)
+        
+        def rate(outcome):
+            return sum(1 for s in samples if s[2] == outcome) / total if total else 0.0
+        
+        return {
+            'samples': total,
+            'p50': self.percentile(engine, 0.5),
+            'p90': self.percentile(engine, 0.9),
+            'error_rate': rate('error'),
+            'captcha_rate': rate('captcha'),
+            'open_for': max(0, reopen)
+        }
+    
+    def score(self, engine):
+        """Expected cost of asking an engine; lower is better"""
+        stats = self.stats(engine)
+        if not stats['samples']:
+            return 2.0  # Untried engines rank like a healthy but slow one
+        failure_rate = stats['error_rate'] + stats['captcha_rate']
+        return (stats['p50'] or 5.0) * (1 + 4 * failure_rate)
+    
+    def rank(self, engines):
+        """Engines with a closed circuit, best first"""
+        return sorted((e for e in engines if self.available(e)), key=self.score)
+    
+    def reset(self, engine=None):
+        with self.lock:
+            for table in (self.samples, self.open_until, self.failures):
+                if engine:
+                    table.pop(engine, None)
+                else:
+                    table.clear()
+        self.save()
+    
+    def load(self):
+        if os.path.exists(self.health_file):
+            try:
+                with open(self.health_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.samples = data.get('samples', {})
+                self.open_until = data.get('open_until', {})
+                self.failures = data.get('failures', {})
+            except:
+                pass
+    
+    def save(self):
+        if not self.health_file:
+            return
+        with self.lock:
+            data = {'samples': self.samples, 'open_until': self.open_until, 'failures': self.failures}
+            try:
+                tmp_file = self.health_file + ".tmp"
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(data, f)
+                os.replace(tmp_file, self.health_file)
+            except:
+                pass
+
+# ==================== SIMPLE SEARCH MANAGER (NO BS4 REQUIRED) ====================
+class SearchManager:
+    def __init__(self, state, network, cache=None, health=None):
+        self.state = state
+        self.network = network
+        self.cache = cache
+        self.health = health or EngineHealth()
+        self.hedge_executor = None
+        self.hedge_lock = threading.Lock()
+        self.primary_requests = 0
+        self.hedged_requests = 0
+    
+    @profiled("search")
+    def search(self, query, engine=None):
+        engine = engine or self.state.current_engine
+        if engine == "all":
+            return self.metasearch(query)
+        
+        engine_config = SEARCH_ENGINES.get(engine, SEARCH_ENGINES["brave"])
+        
+        if not engine_config['enabled']:
+            status_print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} Search engine '{engine_config['name']}' is disabled{Colors.RESET}")
+            status_print(f"{Colors.INFO}Enable it in settings (engines command){Colors.RESET}")
+            return []
+        
+        cached = self._cache_get(query, engine)
+        if cached is not None:
+            status_print(f"{Colors.INFO}{self.state.get_icon('INFO')} {engine_config['name']} results for: {query} (cached){Colors.RESET}")
+            return self._record_search(query, engine, cached)
+        
+        if not self.health.available(engine):
+            status_print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} {engine_config['name']} is failing, skipped for "
+                         f"{self.health.stats(engine)['open_for'] / 60:.0f} more min{Colors.RESET}")
+            return self._fallback_search(query, engine)
+        
+        status_print(f"{Colors.INFO}{self.state.get_icon('INFO')} Searching {engine_config['name']} for: {query}{Colors.RESET}")
+        
+        try:
+            # Check exit flag
+            check_exit_flag()
+            
+            engine, results = self._hedged_fetch(query, engine)
+            if not results:
+                results = [self._placeholder_result(self._build_url(query, SEARCH_ENGINES[engine]), engine, query)]
+            
+            return self._record_search(query, engine, results)
+            
+        except KeyboardInterrupt:
+            raise
+        except CaptchaError:
+            status_print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} CAPTCHA detected! Switching to alternative engine...{Colors.RESET}")
+            return self._fallback_search(query, engine)
+        except Exception as e:
+            status_print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} Search failed: {e}{Colors.RESET}")
+            return self._fallback_search(query, engine)
+    
+    def _record_search(self, query, engine, results):
+        """Add a search to history and make its results current"""
+        self.state.store.add_search(query, engine, len(results))
+        self.state.current_results = results
+        return results
+    
+    def _cache_get(self, query, engine):
+        if not self.cache:
+            return None
+        return self.cache.get(engine, query, SEARCH_ENGINES[engine].get('cache_ttl', 0))
+    
+    def _cache_put(self, query, engine, results):
+        if self.cache and SEARCH_ENGINES[engine].get('cache_ttl', 0) > 0:
+            self.cache.put(engine, query, results)
+    
+    def _build_url(self, query, engine_config):
+        """Build the request URL for an engine"""
+        params = {}
+        for key, value in engine_config["params"].items():
+            params[key] = value.format(query=quote(query))
+        
+        url = engine_config["url"]
+        if params:
+            url += '?' + '&'.join([f"{k}={v}" for k, v in params.items()])
+        return url
+    
+    def _query_engine(self, query, engine):
+        """Fetch and parse one engine without touching browser state (thread safe)"""
+        cached = self._cache_get(query, engine)
+        if cached is not None:
+            return cached
+        return self._fetch_engine(query, engine)
+    
+    def _hedge_delay(self, engine):
+        """Seconds to wait on an engine before asking a backup, or None to not hedge"""
+        hedge = SEARCH_ENGINES[engine].get('hedge') or {}
+        if not hedge.get('enabled'):
+            return None
+        delay = hedge.get('delay') or self.health.percentile(engine, 0.9) or HEDGING['default_delay']
+        return max(delay, HEDGING['min_delay'])
+    
+    def _reserve_hedge(self):
+        """Take one extra request from the budget; False when it is spent"""
+        with self.hedge_lock:
+            if self.hedged_requests + 1 > HEDGING['budget'] * self.primary_requests + 1:
+                return False
+            self.hedged_requests += 1
+            return True
+    
+    def _hedged_fetch(self, query, engine):
+        """Fetch one engine; if it is slower than usual, race the next-best engine.
+        
+        Returns (engine that answered, results). The slower request is
+        cancelled through its job's cancel event. When both fail, the
+        primary engine's error is raised.
+        """
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        
+        with self.hedge_lock:
+            self.primary_requests += 1
+        delay = self._hedge_delay(engine)
+        if delay is None:
+            return engine, self._fetch_engine(query, engine)
+        
+        if self.hedge_executor is None:
+            self.hedge_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="naviduck-hedge")
+        
+        def start(target):
+            job = Job(0, "hedge", target, quiet=True)
+            job.future = self.hedge_executor.submit(self._run_job, job, self._fetch_engine, query, target)
+            jobs.append((target, job))
+        
+        jobs = []
+        start(engine)
+        hedge_at = time.monotonic() + delay
+        
+        try:
+            while True:
                 # Check exit flag
                 check_exit_flag()
                 
-                # Get abstract/answer
-                if data.get("AbstractText"):
-                    results.append({
-                        'title': data.get("Heading", "Answer"),
-                        'url': data.get("AbstractURL", f"https://duckduckgo.com/?q={quote(query)}"),
-                        'snippet': data["AbstractText"][:150],
-                        'engine': 'DuckDuckGo API'
-                    })
+                pending = [job.future for _, job in jobs if not job.future.done()]
+                if pending:
+                    wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
                 
-                # Get related topics
-                for topic in data.get("RelatedTopics", []):
-                    if "Text" in topic and "FirstURL" in topic:
-                        results.append({
-                            'title': topic["Text"].split(" - ")[0][:80],
-                            'url': topic["FirstURL"],
-                            'snippet': topic["Text"][:120],
-                            'engine': 'DuckDuckGo API'
-                        })
+                for target, job in jobs:
+                    if job.future.done() and job.future.exception() is None and job.future.result():
+                        if target != engine:
+                            status_print(f"{Colors.INFO}{self.state.get_icon('INFO')} {SEARCH_ENGINES[target]['name']} answered first{Colors.RESET}")
+                        return target, job.future.result()
                 
-                # Get external links
-                for result in data.get("Results", []):
-                    results.append({
-                        'title': result.get("Text", "Result")[:80],
-                        'url': result.get("FirstURL", ""),
-                        'snippet': result.get("Text", "")[:120],
-                        'engine': 'DuckDuckGo API'
-                    })
-            
-            elif engine == "wikipedia":
-                try:
-                    data = response.json()
-                    if isinstance(data, list) and len(data) >= 4:
-                        for i in range(min(len(data[1]), len(data[2]), len(data[3]))):
-                            results.append({
-                                'title': data[1][i],
-                                'url': data[3][i],
-                                'snippet': data[2][i][:120],
-                                'engine': 'Wikipedia'
-                            })
-                except:
-                    results.append({
-                        'title': "View Wikipedia Search",
-                        'url': f"https://en.wikipedia.org/wiki/Special:Search?search={quote(query)}",
-                        'snippet': "Open Wikipedia search results",
-                        'engine': 'Wikipedia'
-                    })
-            
-            elif engine == "google":
-                # Simple Google parsing
-                html = response.text
+                if all(job.future.done() for _, job in jobs):
+                    # Nothing usable: the primary's error or empty answer decides
+                    primary = jobs[0][1].future
+                    if primary.exception():
+                        raise primary.exception()
+                    return engine, primary.result()
                 
-                # Extract Google results (simplified)
-                pattern = r'<div[^>]*class="[^"]*g[^"]*"[^>]*>.*?<a[^>]+href="([^"]+)"[^>]*>([^<]+)</a>'
-                matches = re.findall(pattern, html, re.DOTALL)
+                if len(jobs) == 1 and time.monotonic() >= hedge_at:
+                    hedge_at = float('inf')
+                    backups = self.health.rank(e for e, config in SEARCH_ENGINES.items()
+                                               if config['enabled'] and e != engine)
+                    if backups and self._reserve_hedge():
+                        status_print(f"{Colors.INFO}{self.state.get_icon('INFO')} {SEARCH_ENGINES[engine]['name']} is slow, also asking {SEARCH_ENGINES[backups[0]]['name']}...{Colors.RESET}")
+                        start(backups[0])
+        finally:
+            # Cancel the loser; it stops at its next chunk or rate-limit tick
+            for _, job in jobs:
+                if not job.future.done():
+                    job.cancelled.set()
+                    job.future.cancel()
+    
+    @staticmethod
+    def _run_job(job, func, *args):
+        JOB_CONTEXT.job = job
+        try:
+            return func(*args)
+        finally:
+            JOB_CONTEXT.job = None
+    
+    def _fetch_engine(self, query, engine):
+        """Fetch and parse one engine, recording the outcome in engine health"""
+        engine_config = SEARCH_ENGINES[engine]
+        use_tor = engine_config["requires_tor"] and self.state.tor_enabled
+        started = time.monotonic()
+        try:
+            with PROFILER.span("search.engine", engine=engine):
+                response = self.network.get(self._build_url(query, engine_config), use_tor=use_tor, stream=True,
+                                            detector=CaptchaDetector(engine))
                 
-                for url, title in matches[:10]:
-                    # Clean Google redirect URLs
-                    if url.startswith('/url?'):
-                        url_match = re.search(r'q=([^&]+)', url)
-                        if url_match:
-                            url = unquote(url_match.group(1))
-                    
-                    if url and title and 'google.com' not in url:
-                        # Try to get snippet
-                        snippet_pattern = f'{re.escape(title)}.*?<div[^>]*class="[^"]*VwiC3b[^"]*"[^>]*>([^<]+)'
-                        snippet_match = re.search(snippet_pattern, html, re.DOTALL)
-                        snippet = snippet_match.group(1)[:120] if snippet_match else ""
-                        
-                        results.append({
-                            'title': re.sub(r'<[^>]+>', '', title).strip()[:80],
-                            'url': url,
-                            'snippet': re.sub(r'<[^>]+>', '', snippet).strip(),
-                            'engine': 'Google'
-                        })
-            
-            elif engine == "brave":
-                # Parse Brave Search
-                html = response.text
+                body = self._read_body(response, engine)
+                if body is None:
+                    raise CaptchaError(f"CAPTCHA detected on {engine_config['name']}")
                 
-                # Brave search results pattern
-                pattern = r'<a[^>]+data-testid="[^"]*result-title[^"]*"[^>]+href="([^"]+)"[^>]*>(.*?)</a>'
-                matches = re.findall(pattern, html, re.DOTALL)
+                results = fuse_results([self._extract_results(body, engine, query)], limit=10)
+        except KeyboardInterrupt:
+            raise
+        except CaptchaError:
+            self.health.record(engine, 'captcha', time.monotonic() - started)
+            raise
+        except Exception:
+            self.health.record(engine, 'error', time.monotonic() - started)
+            raise
+        
+        self.health.record(engine, 'ok', time.monotonic() - started)
+        if results:
+            self._cache_put(query, engine, results)
+        return results
+    
+    def lookup(self, query, engine):
+        """Search without touching browser state; returns (results, cache_hit)"""
+        if engine == "all":
+            return self.metasearch(query, record=False), False
+        
+        cached = self._cache_get(query, engine)
+        if cached is not None:
+            return cached, True
+        # Not _query_engine: it would look in the cache again and count a second miss
+        return self._fetch_engine(query, engine), False
+    
+    @profiled("search.metasearch")
+    def metasearch(self, query, engines=None, quorum=None, deadline=None, record=True):
+        """Query all enabled engines at once, merging results as they arrive"""
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        
+        engines = engines or [e for e, config in SEARCH_ENGINES.items() if config['enabled']]
+        if not engines:
+            status_print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} No search engines enabled{Colors.RESET}")
+            return []
+        
+        healthy = self.health.rank(engines)
+        if len(healthy) < len(engines):
+            status_print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} Skipping {len(engines) - len(healthy)} failing engine(s){Colors.RESET}")
+        engines = healthy or engines
+        
+        quorum = min(quorum or METASEARCH['quorum'], len(engines))
+        deadline = METASEARCH['deadline'] if deadline is None else deadline
+        
+        status_print(f"{Colors.INFO}{self.state.get_icon('INFO')} Searching {len(engines)} engines for: {query}{Colors.RESET}")
+        
+        executor = ThreadPoolExecutor(max_workers=max(1, min(len(engines), METASEARCH['max_workers'])))
+        # Each worker runs as a job of its own so the deadline and a cancelled
+        # caller can stop it; it is as quiet as the caller (batch, serve, bg)
+        caller = getattr(JOB_CONTEXT, 'job', None)
+        jobs = []
+        pending = {}
+        for engine in engines:
+            job = Job(0, "engine", engine, quiet=caller is not None and caller.quiet)
+            job.future = executor.submit(self._run_job, job, self._query_engine, query, engine)
+            jobs.append(job)
+            pending[job.future] = engine
+        engine_results = []
+        answered = 0
+        end_time = time.monotonic() + deadline
+        
+        try:
+            while pending and answered < quorum:
+                # Check exit flag
+                check_exit_flag()
+                
+                remaining = end_time - time.monotonic()
+                if remaining <= 0:
+                    status_print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} Deadline reached, {len(pending)} engine(s) still pending{Colors.RESET}")
+                    break
+                
+                # Short waits so Ctrl+X is noticed while engines are slow
+                done, _ = wait(pending, timeout=min(remaining, 0.25), return_when=FIRST_COMPLETED)
+                for future in done:
+                    engine = pending.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        status_print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} {SEARCH_ENGINES[engine]['name']} failed: {str(e)[:60]}{Colors.RESET}")
+                        continue
+                    
+                    if results:
+                        answered += 1
+                        engine_results.append(results)
+        finally:
+            # Stragglers stop at their next chunk or rate-limit tick
+            for job in jobs:
+                if not job.future.done():
+                    job.cancelled.set()
+                    job.future.cancel()
+            executor.shutdown(wait=False)
+        
+        results = fuse_results(engine_results)
+        if not results:
+            status_print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} All search engines failed. Try enabling Tor or use a different network.{Colors.RESET}")
+        
+        if not record:
+            return results
+        return self._record_search(query, 'all', results)
+    
+    @profiled("search.read")
+    def _read_body(self, response, engine):
+        """Stream the response body, returning None as soon as a CAPTCHA shows up"""
+        detector = CaptchaDetector(engine)
+        parts = []
+        try:
+            if detector.check_response(response):
+                return None
+            
+            decoder = response_decoder(response)
+            for chunk in response.iter_content(chunk_size=PAGE_LIMITS['chunk_size']):
+                # Check exit flag
+                check_exit_flag()
                 
-                for url, title in matches[:10]:
-                    if 'brave.com' not in url:
-                        title = re.sub(r'<[^>]+>', '', title).strip()
-                        if title:
-                            results.append({
-                                'title': title[:80],
-                                'url': url,
-                                'snippet': f"Result from Brave Search for: {query}",
-                                'engine': 'Brave'
-                            })
+                text = decoder.decode(chunk)
+                if detector.feed(text):
+                    return None
+                parts.append(text)
+            parts.append(decoder.decode(b'', final=True))
+        finally:
+            response.close()
+        return ''.join(parts)
+    
+    def _check_captcha(self, html, engine=None):
+        """Check if the response contains CAPTCHA"""
+        return CaptchaDetector(engine).check(html)
+    
+    def _fallback_search(self, query, failed_engine):
+        """Try the healthiest other engines when one fails"""
+        alternatives = self.health.rank(
+            e for e, config in SEARCH_ENGINES.items() if config['enabled'] and e != failed_engine
+        )
         
-        except KeyboardInterrupt:
-            raise
-        except Exception as e:
-            print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} Parse error: {e}{Colors.RESET}")
+        for alt_engine in alternatives:
+            status_print(f"{Colors.INFO}{self.state.get_icon('INFO')} Trying {SEARCH_ENGINES[alt_engine]['name']}...{Colors.RESET}")
+            try:
+                results = self._query_engine(query, alt_engine)
+            except KeyboardInterrupt:
+                raise
+            except:
+                continue
+            if results:
+                return self._record_search(query, alt_engine, results)
+        
+        # Last resort: return empty results with suggestion
+        status_print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} All search engines failed. Try enabling Tor or use a different network.{Colors.RESET}")
+        return []
+    
+    @profiled("search.parse_results")
+    def parse_results(self, response, engine, query):
+        """Simple parsing without BeautifulSoup"""
+        results = self._extract_results(response.text, engine, query)
         
         # If no results found, show search page
         if not results:
-            results.append({
-                'title': f"View {SEARCH_ENGINES[engine]['name']} Search Results",
-                'url': response.url,
-                'snippet': f"Search results for '{query}'",
-                'engine': SEARCH_ENGINES[engine]['name']
-            })
+            results.append(self._placeholder_result(response.url, engine, query))
         
         return results[:10]
+    
+    def _placeholder_result(self, url, engine, query):
+        """Link to the engine's own results page"""
+        return {
+            'title': f"View {SEARCH_ENGINES[engine]['name']} Search Results",
+            'url': url,
+            'snippet': f"Search results for '{query}'",
+            'engine': SEARCH_ENGINES[engine]['name']
+        }
+    
+    @profiled("search.parse")
+    def _extract_results(self, body, engine, query):
+        """Extract results from an engine response body (empty list if none)"""
+        parser = RESULT_PARSERS.get(engine)
+        if not parser:
+            return []
+        
+        try:
+            # Check exit flag
+            check_exit_flag()
+            
+            return parser.parse(body, query)
+        except KeyboardInterrupt:
+            raise
+        except Exception as e:
+            status_print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} Parse error: {e}{Colors.RESET}")
+            return []
+
+# ==================== HTML TEXT EXTRACTOR ====================
+HREF_PATTERN = re.compile(r'''href\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+
+class HTMLTextExtractor:
+    """Single-pass HTML tokenizer - feed it decoded chunks as they arrive.
+    
+    Collects visible text, title, headings and links in one scan. Every
+    character is looked at a bounded number of times, so malformed pages
+    can't cause the backtracking the old regex passes suffered from.
+    """
+    
+    RAW_TAGS = ('script', 'style')
+    HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+    MAX_TAG_LENGTH = 2048  # Longer tags are still skipped, just not parsed
+    
+    def __init__(self, max_chars=2000):
+        self.max_chars = max_chars
+        self.parts = []
+        self.length = 0
+        self.title_parts = []
+        self.in_title = False
+        self.headings = []     # (level, text)
+        self.heading = None    # [level, parts] while inside <hN>
+        self.links = []        # {'url', 'text'}
+        self.link = None       # [url, parts] while inside <a href>
+        self.state = "text"    # text, tag, comment or raw (script/style body)
+        self.tag_parts = []
+        self.tag_length = 0
+        self.tail = ""         # Carried over while looking for an end marker
+        self.text_tail = ""    # Unfinished '&entity' or '<!--' carried to the next chunk
+        self.end_marker = ""
+        self.done = False
+    
+    def feed(self, data):
+        """Process the next chunk of decoded HTML"""
+        if self.text_tail:
+            data = self.text_tail + data
+            self.text_tail = ""
+        
+        pos = 0
+        size = len(data)
+        
+        while pos < size and not self.done:
+            if self.state == "text":
+                end = data.find('<', pos)
+                if end == -1:
+                    # Hold back a possibly split character reference
+                    amp = data.rfind('&', max(pos, size - 12))
+                    if amp != -1 and ';' not in data[amp:]:
+                        self.text_tail = data[amp:]
+                        size = amp
+                    self._add_text(data[pos:size])
+                    return
+                self._add_text(data[pos:end])
+                self.state = "tag"
+                self.tag_parts = []
+                self.tag_length = 0
+                pos = end + 1
+            
+            elif self.state == "tag":
+                if self.tag_length == 0:
+                    # '<' not followed by a tag start is plain text
+                    if not (data[pos].isalpha() or data[pos] in '/!?'):
+                        self._add_text('<')
+                        self.state = "text"
+                        continue
+                    if size - pos < 3 and '!--'.startswith(data[pos:]):
+                        # Might be a comment opener split across chunks
+                        self.text_tail = data[pos:]
+                        return
+                    if data.startswith('!--', pos):
+                        self.state = "comment"
+                        self.end_marker = "-->"
+                        self.tail = ""
+                        pos += 3
+                        continue
+                
+                end = data.find('>', pos)
+                piece = data[pos:] if end == -1 else data[pos:end]
+                if self.tag_length < self.MAX_TAG_LENGTH:
+                    self.tag_parts.append(piece[:self.MAX_TAG_LENGTH])
+                self.tag_length += len(piece) or 1
+                if end == -1:
+                    return
+                self._handle_tag(''.join(self.tag_parts))
+                pos = end + 1
+            
+            else:
+                # comment or raw: skip until the end marker, case-insensitively
+                marker = self.end_marker
+                found = None
+                if self.tail:
+                    # The marker may straddle the previous chunk
+                    bridge = self.tail + data[pos:pos + len(marker) - 1]
+                    at = self._find_marker(bridge, 0)
+                    if at != -1:
+                        found = pos + at - len(self.tail)
+                if found is None:
+                    at = self._find_marker(data, pos)
+                    if at == -1:
+                        self.tail = (self.tail + data[max(pos, size - len(marker)):])[-(len(marker) - 1):]
+                        return
+                    found = at
+                
+                pos = found + len(marker)
+                self.tail = ""
+                if self.state == "raw":
+                    # Let the tag state consume the rest of '</script ...>'
+                    self.state = "tag"
+                    self.tag_parts = [marker[1:]]
+                    self.tag_length = len(marker) - 1
+                else:
+                    self.state = "text"
+    
+    def close(self):
+        """Flush anything held back at the end of the document"""
+        if self.text_tail and self.state == "text":
+            tail, self.text_tail = self.text_tail, ""
+            self._add_text(tail)
+    
+    def _find_marker(self, data, start):
+        """Case-insensitive find of end_marker, checking each candidate once"""
+        marker = self.end_marker
+        head = marker[:2]
+        index = data.find(head, start)
+        while index != -1:
+            if data[index:index + len(marker)].lower() == marker:
+                return index
+            index = data.find(head, index + 1)
+        return -1
+    
+    def _handle_tag(self, tag):
+        closing = tag.startswith('/')
+        name = tag.lstrip('/').split(None, 1)[0].rstrip('/').lower() if tag.strip('/ ') else ""
+        
+        if name == "title":
+            self.in_title = not closing
+        
+        elif name in self.HEADING_TAGS:
+            if closing and self.heading:
+                text = ' '.join(''.join(self.heading[1]).split())
+                if text:
+                    self.headings.append((self.heading[0], text))
+                self.heading = None
+            elif not closing:
+                self.heading = [int(name[1]), []]
+        
+        elif name == "a":
+            if closing and self.link:
+                self.links.append({
+                    'url': self.link[0],
+                    'text': ' '.join(''.join(self.link[1]).split())
+                })
+                self.link = None
+            elif not closing:
+                match = HREF_PATTERN.search(tag)
+                if match:
+                    url = next(group for group in match.groups() if group is not None)
+                    self.link = [html_unescape(url), []]
+        
+        # Tags become spaces, like the old '<[^>]+>' substitution
+        self._add_space()
+        
+        if not closing and name in self.RAW_TAGS and not tag.endswith('/'):
+            self.state = "raw"
+            self.end_marker = "</" + name
+            self.tail = ""
+        else:
+            self.state = "text"
+    
+    def _add_space(self):
+        if self.parts and self.parts[-1] != ' ':
+            self.parts.append(' ')
+            self.length += 1
+    
+    def _add_text(self, text):
+        if not text:
+            return
+        if '&' in text:
+            text = html_unescape(text)
+        
+        if self.in_title:
+            self.title_parts.append(text)
+        if self.heading:
+            self.heading[1].append(text)
+        if self.link:
+            self.link[1].append(text)
+        
+        words = text.split()
+        if text[0].isspace():
+            self._add_space()
+        if words:
+            joined = ' '.join(words)
+            self.parts.append(joined)
+            self.length += len(joined)
+            if text[-1].isspace():
+                self._add_space()
+        
+        if self.length >= self.max_chars:
+            self.done = True
+    
+    @property
+    def title(self):
+        return ' '.join(''.join(self.title_parts).split())
+    
+    @property
+    def text(self):
+        return ''.join(self.parts).strip()[:self.max_chars]
+
+def extract_html(html, max_chars=2000):
+    """Extract title, text, headings and links from a complete HTML string"""
+    extractor = HTMLTextExtractor(max_chars)
+    extractor.feed(html)
+    extractor.close()
+    return {
+        'title': extractor.title,
+        'text': extractor.text,
+        'headings': extractor.headings,
+        'links': extractor.links
+    }
 
 # ==================== PAGE LOADER ====================
 class PageLoader:
@@ -831,61 +3185,19 @@ class PageLoader:
         self.state = state
         self.network = network
     
+    @profiled("page.load")
     def load_page(self, url, display=True):
-        print(f"{Colors.INFO}{self.state.get_icon('INFO')} Loading: {url}{Colors.RESET}")
+        status_print(f"{Colors.INFO}{self.state.get_icon('INFO')} Loading: {url}{Colors.RESET}")
         
         try:
             # Check exit flag
             check_exit_flag()
             
-            use_tor = url.endswith(".onion") or self.state.tor_enabled
-            
             if display:
                 # For display mode, get full content
-                response = self.network.get(url, use_tor=use_tor)
-                
-                # Check exit flag
-                check_exit_flag()
-                
-                content_type = response.headers.get('content-type', '').lower()
-                
-                if 'text/html' in content_type:
-                    # Simple HTML parsing without BS4
-                    html = response.text
-                    
-                    # Extract title
-                    title_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE)
-                    title = title_match.group(1) if title_match else url
-                    
-                    # Remove scripts and styles
-                    content = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL | re.IGNORECASE)
-                    content = re.sub(r'<style[^>]*>.*?</style>', '', content, flags=re.DOTALL | re.IGNORECASE)
-                    content = re.sub(r'<[^>]+>', ' ', content)
-                    content = re.sub(r'\s+', ' ', content)[:2000]
-                    
-                else:
-                    content = response.text[:2000]
-                    title = url
-                
-                self.state.current_url = url
-                self.state.current_title = title[:80]
-                self.state.current_page = content
-                
-                self.state.history.append({
-                    'type': 'visit',
-                    'url': url,
-                    'title': title[:80],
-                    'timestamp': datetime.now().isoformat(),
-                    'tor': use_tor
-                })
-                
-                self.state.save_data()
-                return {
-                    'success': True,
-                    'title': title,
-                    'content': content,
-                    'tor': use_tor
-                }
+                page = self.fetch_page(url)
+                self.record_visit(page)
+                return page
             else:
                 # Just open in browser
                 self.state.current_url = url
@@ -901,6 +3213,137 @@ class PageLoader:
                 'error': error_msg,
                 'content': error_msg
             }
+    
+    @profiled("page.fetch")
+    def fetch_page(self, url):
+        """Download and extract a page without touching browser state (thread safe)"""
+        if self.state.offline:
+            page = self.state.archive.get(url)
+            if not page:
+                raise LookupError("not in the offline archive")
+            return page
+        
+        use_tor = url.endswith(".onion") or self.state.tor_enabled
+        archive = ARCHIVE['enabled'] and not use_tor
+        
+        try:
+            response = self.network.get(url, use_tor=use_tor, use_cache=True, stream=True)
+        except KeyboardInterrupt:
+            raise
+        except Exception:
+            # Site down or no connection: an archived copy beats an error
+            page = self.state.archive.get(url) if archive else None
+            if not page:
+                raise
+            status_print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} Unreachable, showing archived copy{Colors.RESET}")
+            return page
+        try:
+            extracted = self._read_content(response, url, use_tor, keep_body=archive)
+        finally:
+            response.close()
+        
+        page = {
+            'success': True,
+            'url': url,
+            'title': extracted['title'],
+            'content': extracted['content'],
+            'headings': extracted['headings'],
+            'links': extracted['links'],
+            'tor': use_tor
+        }
+        if archive:
+            try:
+                self.state.archive.put(url, page, extracted['body'], response.headers.get('content-type', ''))
+            except KeyboardInterrupt:
+                raise
+            except Exception:
+                pass  # Archiving is best effort; the page itself loaded fine
+        return page
+    
+    def record_visit(self, page):
+        """Make a fetched page current and add it to history"""
+        self.state.current_url = page['url']
+        self.state.current_title = page['title'][:80]
+        self.state.current_page = page['content']
+        self.state.current_page_data = page
+        self.state.current_scroll = 0
+        
+        self.state.store.add_visit(page['url'], page['title'][:80], page['tor'])
+        if not page['tor']:
+            # Like the HTTP cache and the archive, keep Tor page text off disk
+            self.state.store.index_page(page['url'], page['title'], page['content'])
+    
+    @profiled("page.read")
+    def _read_content(self, response, url, use_tor=False, keep_body=False):
+        """Stream the body until enough visible text is collected or the byte budget is spent.
+        
+        With keep_body the whole body (up to max_bytes) is read and returned
+        as 'body' so the archive holds the complete page, not just the part
+        the extractor needed.
+        """
+        content_type = response.headers.get('content-type', '').lower()
+        is_html = 'text/html' in content_type
+        decoder = response_decoder(response)
+        
+        extractor = HTMLTextExtractor(PAGE_LIMITS['max_chars']) if is_html else None
+        text_parts = []
+        text_length = 0
+        chunks = []
+        received = 0
+        text_done = False
+        complete = False
+        
+        for chunk in response.iter_content(chunk_size=PAGE_LIMITS['chunk_size']):
+            # Check exit flag
+            check_exit_flag()
+            
+            chunks.append(chunk)
+            received += len(chunk)
+            
+            if not text_done:
+                text = decoder.decode(chunk)
+                if extractor:
+                    extractor.feed(text)
+                    text_done = extractor.done
+                else:
+                    text_parts.append(text)
+                    text_length += len(text)
+                    text_done = text_length >= PAGE_LIMITS['max_chars']
+            
+            if (text_done and not keep_body) or received >= PAGE_LIMITS['max_bytes']:
+                break
+        else:
+            complete = True
+        
+        body = b''.join(chunks)
+        # A cut-off body would be revalidated (304) and served cut off for good
+        if complete and not getattr(response, 'from_cache', False) and not use_tor:
+            self.network.http_cache.store(url, response, body)
+        
+        if not extractor:
+            return {
+                'title': url,
+                'content': ''.join(text_parts)[:PAGE_LIMITS['max_chars']],
+                'headings': [],
+                'links': [],
+                'body': body
+            }
+        
+        extractor.close()
+        base_url = response.url or url
+        links = []
+        for link in extractor.links:
+            if link['url'].startswith(('#', 'javascript:', 'mailto:')):
+                continue
+            links.append({'url': urljoin(base_url, link['url']), 'text': link['text']})
+        
+        return {
+            'title': extractor.title or url,
+            'content': extractor.text,
+            'headings': extractor.headings,
+            'links': links,
+            'body': body
+        }
 
 # ==================== TOR MANAGER ====================
 class TorManager:
@@ -910,8 +3353,6 @@ class TorManager:
         self.tor_data_dir = None
         self.tor_dir = r"D:\APPS&DATA\Tor Browser\Browser\TorBrowser\Tor"
         self.tor_exe = os.path.join(self.tor_dir, "tor.exe")
-        
-        self.ensure_tor_in_path()
     
     def ensure_tor_in_path(self):
         current_path = os.environ.get('PATH', '')
@@ -919,9 +3360,12 @@ class TorManager:
             os.environ['PATH'] = current_path + ';' + self.tor_dir
     
     def check_tor(self):
+        import subprocess
+        
         if not os.path.exists(self.tor_exe):
             return False
         
+        self.ensure_tor_in_path()
         try:
             original_cwd = os.getcwd()
             os.chdir(self.tor_dir)
@@ -949,6 +3393,9 @@ class TorManager:
             print(f"{Colors.INFO}Expected at: {self.tor_exe}{Colors.RESET}")
             return False
         
+        import subprocess
+        import tempfile
+        
         try:
             self.tor_data_dir = tempfile.mkdtemp(prefix="naviduck_tor_")
             
@@ -988,6 +3435,7 @@ class TorManager:
                 self.tor_process = None
             
             if self.tor_data_dir and os.path.exists(self.tor_data_dir):
+                import shutil
                 shutil.rmtree(self.tor_data_dir)
             
             self.state.tor_enabled = False
@@ -998,6 +3446,250 @@ class TorManager:
             print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} Failed to stop Tor: {e}{Colors.RESET}")
             return False
 
+# ==================== PREFETCHER ====================
+class Prefetcher:
+    """Speculatively loads the top search results while the list is being read.
+    
+    Each search starts a new generation: queued and running fetches of the
+    previous one are cancelled and their pages dropped. Finished pages are
+    kept until opened or until max_chars of text is exceeded, oldest first.
+    """
+    
+    def __init__(self, state, page_loader):
+        from collections import OrderedDict
+        
+        self.state = state
+        self.page_loader = page_loader
+        self.executor = None
+        self.generation = 0
+        self.pending = {}
+        self.pages = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+    
+    def start(self, results):
+        """Cancel the previous batch and queue the top results of a new one"""
+        self.cancel()
+        if not PREFETCH['enabled'] or (self.state.tor_enabled and not PREFETCH['over_tor']):
+            return
+        
+        if self.executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self.executor = ThreadPoolExecutor(max_workers=PREFETCH['max_workers'],
+                                               thread_name_prefix="naviduck-prefetch")
+        
+        with self.lock:
+            generation = self.generation
+            for result in results[:PREFETCH['count']]:
+                url = result.get('url', '')
+                if not url.startswith(("http://", "https://")) or url.endswith(".onion") or url in self.pending:
+                    continue
+                job = Job(0, "prefetch", url, quiet=True)
+                job.future = self.executor.submit(self._fetch, generation, job, url)
+                self.pending[url] = job
+    
+    def _fetch(self, generation, job, url):
+        JOB_CONTEXT.job = job
+        try:
+            page = self.page_loader.fetch_page(url)
+        except BaseException:
+            # Cancelled, Ctrl+X or a failed fetch - the page loads normally when opened
+            page = None
+        finally:
+            JOB_CONTEXT.job = None
+        
+        with self.lock:
+            if generation != self.generation:
+                return None
+            self.pending.pop(url, None)
+            if page:
+                self.pages[url] = page
+                self.size += self._page_size(page)
+                while self.size > PREFETCH['max_chars'] and len(self.pages) > 1:
+                    _, evicted = self.pages.popitem(last=False)
+                    self.size -= self._page_size(evicted)
+        return page
+    
+    @staticmethod
+    def _page_size(page):
+        return len(page['content']) + sum(len(link['url']) + len(link['text']) for link in page['links'])
+    
+    def take(self, url):
+        """Return a prefetched page, waiting for one still in flight; None if not prefetched"""
+        from concurrent.futures import TimeoutError as FutureTimeout
+        
+        with self.lock:
+            page = self.pages.pop(url, None)
+            if page:
+                self.size -= self._page_size(page)
+                return page
+            job = self.pending.get(url)
+        
+        if job is None:
+            return None
+        
+        while True:
+            if get_exit_flag():
+                raise KeyboardInterrupt("Ctrl+X pressed")
+            try:
+                job.future.result(timeout=0.1)
+                break
+            except FutureTimeout:
+                continue
+            except Exception:
+                return None
+        
+        with self.lock:
+            page = self.pages.pop(url, None)
+            if page:
+                self.size -= self._page_size(page)
+            return page
+    
+    def cancel(self):
+        """Stop all in-flight fetches and forget prefetched pages"""
+        with self.lock:
+            self.generation += 1
+            for job in self.pending.values():
+                job.cancelled.set()
+                job.future.cancel()
+            self.pending.clear()
+            self.pages.clear()
+            self.size = 0
+
+# ==================== ASYNC CORE ====================
+class JobInterrupted(Exception):
+    """A job's worker stopped because of Ctrl+X or cancellation"""
+
+class Job:
+    """A search, page load or AI question running on the async core"""
+    
+    def __init__(self, job_id, kind, description, quiet=False):
+        self.id = job_id
+        self.kind = kind
+        self.description = description
+        self.quiet = quiet
+        self.cancelled = threading.Event()
+        self.future = None
+        self.started = time.monotonic()
+        self.finished = None
+    
+    @property
+    def status(self):
+        if self.cancelled.is_set() or self.future.cancelled():
+            return "cancelled"
+        if not self.future.done():
+            return "running"
+        error = self.future.exception()
+        if isinstance(error, JobInterrupted):
+            return "cancelled"
+        return "failed" if error else "done"
+    
+    @property
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+class AsyncCore:
+    """Thread pool that runs searches, page loads and NavAI as background jobs.
+    
+    The REPL keeps reading input while jobs run, and cancelling a job
+    returns control at once. Cancellation is checkpoint-based: the
+    blocking transport cannot be interrupted mid-read, so a cancelled
+    worker stops at its next chunk or rate-limit tick through
+    check_exit_flag(), and a request already on the wire finishes or
+    times out in the background.
+    """
+    
+    MAX_FINISHED = 50  # Finished jobs kept for 'jobs' and 'fg' before the oldest go
+    
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.executor = None
+        self.jobs = {}
+        self.next_id = 1
+        self.lock = threading.Lock()
+    
+    def start(self):
+        if self.executor:
+            return
+        from concurrent.futures import ThreadPoolExecutor
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="naviduck-job")
+    
+    def submit(self, kind, description, func, *args, quiet=False, on_done=None):
+        """Schedule func(*args) on a worker and return its Job"""
+        self.start()
+        
+        with self.lock:
+            job = Job(self.next_id, kind, description, quiet)
+            self.jobs[job.id] = job
+            self.next_id += 1
+            self._prune()
+        
+        job.future = self.executor.submit(self._call, job, func, args)
+        # Also runs for jobs cancelled before a worker picked them up
+        job.future.add_done_callback(lambda future: setattr(job, 'finished', time.monotonic()))
+        if on_done:
+            job.future.add_done_callback(lambda future: on_done(job))
+        return job
+    
+    def _call(self, job, func, args):
+        JOB_CONTEXT.job = job
+        try:
+            return func(*args)
+        except KeyboardInterrupt as e:
+            # Reported as a cancelled job rather than a failure
+            raise JobInterrupted(str(e)) from None
+        finally:
+            JOB_CONTEXT.job = None
+    
+    def cancel(self, job):
+        job.cancelled.set()
+        job.future.cancel()
+    
+    def wait(self, job):
+        """Block the REPL on a job while staying responsive to Ctrl+X"""
+        from concurrent.futures import TimeoutError as FutureTimeout, CancelledError
+        
+        while True:
+            if get_exit_flag():
+                self.cancel(job)
+                raise KeyboardInterrupt("Ctrl+X pressed")
+            # A running worker only notices at its next checkpoint; don't wait for it
+            if job.cancelled.is_set():
+                raise KeyboardInterrupt(f"Job #{job.id} cancelled")
+            try:
+                return job.future.result(timeout=0.1)
+            except FutureTimeout:
+                continue
+            except (CancelledError, JobInterrupted):
+                raise KeyboardInterrupt(f"Job #{job.id} cancelled")
+    
+    def run(self, kind, description, func, *args):
+        """Run func in the foreground: submit and wait"""
+        job = self.submit(kind, description, func, *args)
+        try:
+            return self.wait(job)
+        finally:
+            self.forget(job)
+    
+    def forget(self, job):
+        """Drop a job whose result has been used"""
+        with self.lock:
+            self.jobs.pop(job.id, None)
+    
+    def _prune(self):
+        """Keep at most MAX_FINISHED finished jobs, oldest dropped first (lock must be held)"""
+        finished = [job_id for job_id, job in self.jobs.items() if job.future and job.future.done()]
+        for job_id in finished[:max(0, len(finished) - self.MAX_FINISHED)]:
+            del self.jobs[job_id]
+    
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+    
+    def list_jobs(self):
+        with self.lock:
+            return list(self.jobs.values())
+
 # ==================== ENHANCED UI MANAGER ====================
 class UIManager:
     def __init__(self, state, search_mgr, page_loader, tor_mgr):
@@ -1005,14 +3697,21 @@ class UIManager:
         self.search_mgr = search_mgr
         self.page_loader = page_loader
         self.tor_mgr = tor_mgr
-        self.ai = NavAI(state.icons if state.use_emoji else Icons.NERD)
+        self.ai = NavAI(state.icons if state.use_emoji else Icons.NERD, cache=search_mgr.cache,
+                        network=search_mgr.network)
         self.last_results = []
+        self.core = AsyncCore()
+        self.prefetcher = Prefetcher(state, page_loader)
+        self.sessions = SessionStore(state.sessions_dir)
         
         # Set up signal handlers
         signal.signal(signal.SIGINT, self.signal_handler)
         if hasattr(signal, 'SIGBREAK'):
             signal.signal(signal.SIGBREAK, self.signal_handler)
         
+        # clear_screen() and the colours are plain escape sequences
+        enable_ansi_escapes()
+        
         # On Windows, also catch CTRL_C_EVENT and CTRL_BREAK_EVENT
         if os.name == 'nt':
             try:
@@ -1033,23 +3732,61 @@ class UIManager:
         set_exit_flag()
         print(f"\n{Colors.WARNING}Ctrl+X detected. Exiting...{Colors.RESET}")
     
-    def print_error(self, message):
-        print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} {message}{Colors.RESET}")
+    def run_search(self, query, engine=None):
+        """Search as a foreground job so Ctrl+X is noticed immediately"""
+        self.prefetcher.cancel()
+        if self.state.offline:
+            self.print_warning("Offline: searching needs the network (try 'history find' or 'bookmarks')")
+            return []
+        return self.core.run("search", query, self.search_mgr.search, query, engine)
+    
+    def run_load(self, url):
+        """Load a page as a foreground job, using a prefetched copy when there is one"""
+        page = self.prefetcher.take(url)
+        if page:
+            print(f"{Colors.INFO}{self.state.get_icon('INFO')} Loading: {url} (prefetched){Colors.RESET}")
+            self.page_loader.record_visit(page)
+            return page
+        return self.core.run("page", url, self.page_loader.load_page, url, True)
+    
+    def archived_urls(self, urls):
+        """Which of urls can be opened offline (empty while the archive is unused)"""
+        if not (ARCHIVE['enabled'] or self.state.offline):
+            return set()
+        return self.state.archive.archived(urls)
+    
+    def archive_bookmark(self, url):
+        """Pin a bookmarked page in the archive, fetching it first if needed"""
+        if not (ARCHIVE['enabled'] or self.state.offline):
+            return
+        if self.state.archive.archived([url]):
+            self.state.archive.pin(url)
+        elif not self.state.offline:
+            self.core.submit("archive", url, self.archive_page, url, quiet=True)
+    
+    def archive_page(self, url):
+        page = self.page_loader.fetch_page(url)
+        self.state.archive.pin(url)
+        return page
+    
+    def print_error(self, message, file=None):
+        print(f"{Colors.ERROR}{self.state.get_icon('ERROR')} {message}{Colors.RESET}", file=file)
     
-    def print_success(self, message):
-        print(f"{Colors.SUCCESS}{self.state.get_icon('SUCCESS')} {message}{Colors.RESET}")
+    def print_success(self, message, file=None):
+        print(f"{Colors.SUCCESS}{self.state.get_icon('SUCCESS')} {message}{Colors.RESET}", file=file)
     
-    def print_warning(self, message):
-        print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} {message}{Colors.RESET}")
+    def print_warning(self, message, file=None):
+        print(f"{Colors.WARNING}{self.state.get_icon('WARNING')} {message}{Colors.RESET}", file=file)
     
-    def print_info(self, message):
-        print(f"{Colors.INFO}{self.state.get_icon('INFO')} {message}{Colors.RESET}")
+    def print_info(self, message, file=None):
+        print(f"{Colors.INFO}{self.state.get_icon('INFO')} {message}{Colors.RESET}", file=file)
     
-    def print_ai(self, message):
-        print(f"{Colors.MAGENTA}{self.state.get_icon('AI')} {message}{Colors.RESET}")
+    def print_ai(self, message, file=None):
+        print(f"{Colors.MAGENTA}{self.state.get_icon('AI')} {message}{Colors.RESET}", file=file)
     
-    def show_banner(self):
-        clear_screen()
+    @buffered
+    def show_banner(self, screen=None):
+        clear_screen(file=screen)
         
         # Check exit flag
         check_exit_flag()
@@ -1065,20 +3802,21 @@ class UIManager:
 
 {Colors.INFO}{self.state.get_icon('SEARCH')}  Default Engine: {Colors.HIGHLIGHT}{SEARCH_ENGINES[self.state.current_engine]['name']}{Colors.RESET}
 {Colors.INFO}{self.state.get_icon('TOR')}  Tor: {Colors.HIGHLIGHT}{'ON' if self.state.tor_enabled else 'OFF'}{Colors.RESET}
-{Colors.INFO}{self.state.get_icon('HISTORY')}  History: {Colors.HIGHLIGHT}{len(self.state.history)} entries{Colors.RESET}
-{Colors.INFO}{self.state.get_icon('BOOKMARK')}  Bookmarks: {Colors.HIGHLIGHT}{len(self.state.bookmarks)} saved{Colors.RESET}
+{Colors.INFO}{self.state.get_icon('HISTORY')}  History: {Colors.HIGHLIGHT}{self.state.store.count()} entries{Colors.RESET}
+{Colors.INFO}{self.state.get_icon('BOOKMARK')}  Bookmarks: {Colors.HIGHLIGHT}{self.state.store.bookmark_count()} saved{Colors.RESET}
 {Colors.INFO}{self.state.get_icon('AI')}  NavAI: {Colors.HIGHLIGHT}Ready{Colors.RESET}
 {Colors.INFO}{self.state.get_icon('SETTINGS')}  Icons: {Colors.HIGHLIGHT}{icon_type}{Colors.RESET}
 {Colors.INFO}{self.state.get_icon('WARNING')}  Press Ctrl+X or type ^X to quit immediately{Colors.RESET}
 """
-        print(banner)
+        print(banner, file=screen)
     
-    def show_main_menu(self):
-        self.show_banner()
+    @buffered
+    def show_main_menu(self, screen=None):
+        self.show_banner(screen=screen)
         
-        print(f"{Colors.INFO}╞{'═' * 70}╡{Colors.RESET}")
-        print(f"{Colors.INFO} Quick Actions:{Colors.RESET}")
-        print(f"{Colors.INFO}╞{'═' * 70}╡{Colors.RESET}")
+        print(f"{Colors.INFO}╞{'═' * 70}╡{Colors.RESET}", file=screen)
+        print(f"{Colors.INFO} Quick Actions:{Colors.RESET}", file=screen)
+        print(f"{Colors.INFO}╞{'═' * 70}╡{Colors.RESET}", file=screen)
         
         actions = [
             (f"{self.state.get_icon('SEARCH')}  Search", "search [query] or s [query]"),
@@ -1094,56 +3832,72 @@ class UIManager:
         ]
         
         for icon_text, command in actions:
-            print(f"  {Colors.CYAN}{command:25}{Colors.RESET} {icon_text}")
+            print(f"  {Colors.CYAN}{command:25}{Colors.RESET} {icon_text}", file=screen)
         
         # Show recent searches
-        recent = [h for h in self.state.history if h['type'] == 'search'][-3:]
+        recent = self.state.store.recent(3, 'search')[::-1]
         if recent:
-            print(f"\n{Colors.INFO}{self.state.get_icon('HISTORY')}  Recent Searches:{Colors.RESET}")
+            print(f"\n{Colors.INFO}{self.state.get_icon('HISTORY')}  Recent Searches:{Colors.RESET}", file=screen)
             for entry in recent:
-                engine_icon = self.state.get_icon(SEARCH_ENGINES[entry.get('engine', 'brave')]['icon'])
-                print(f"  {engine_icon} {entry.get('query', '')[:40]}")
+                engine_icon = self.state.get_engine_icon(entry.get('engine', 'brave'))
+                print(f"  {engine_icon} {entry.get('query', '')[:40]}", file=screen)
         
-        print(f"\n{Colors.PROMPT}Type a command (try 'ai hello' or 's python'):{Colors.RESET}")
-        print(f"{Colors.GRAY}Press Ctrl+X or type ^X to quit immediately{Colors.RESET}")
+        print(f"\n{Colors.PROMPT}Type a command (try 'ai hello' or 's python'):{Colors.RESET}", file=screen)
+        print(f"{Colors.GRAY}Press Ctrl+X or type ^X to quit immediately{Colors.RESET}", file=screen)
     
-    def show_help(self):
-        print_header("Help & Commands")
+    @buffered
+    def show_help(self, screen=None):
+        print_header("Help & Commands", file=screen)
         
         commands = [
             ("s [query]", "Quick search", "Uses default engine"),
             ("search [engine] [query]", "Search with engine", "e.g., 'search google cats'"),
+            ("search all [query]", "Metasearch", "Queries every enabled engine at once"),
             ("ai [question]", "Ask NavAI", "Real AI using web search"),
             ("go [url]", "View page in NaviDuck", "Displays content here"),
             ("open [url or #]", "Open in system browser", "# opens from last results"),
             ("history", "Show browsing history", ""),
+            ("history find [terms]", "Search pages you have read", "Works offline"),
             ("bookmarks", "Manage bookmarks", "[add|delete|list]"),
+            ("archive [on|off|clear]", "Offline copies of visited pages", "Start with --offline to browse them"),
             ("tor [start|stop]", "Control Tor connection", ""),
             ("settings", "Open settings menu", ""),
             ("engines", "Manage search engines", ""),
+            ("cache [clear]", "Show or clear result cache", ""),
+            ("session [save|load|list|delete] [name]", "Save or restore a browsing session", "Restores without refetching"),
+            ("health [reset]", "Engine latency, errors and CAPTCHAs", "Failing engines are skipped"),
+            ("stats [on|off|reset]", "Time spent per pipeline stage", "stats trace FILE saves a Chrome trace"),
+            ("bg [s|search|go|ai] ...", "Run in the background", "Keep typing while it loads"),
+            ("jobs", "List background jobs", ""),
+            ("fg [#]", "Show a job's result", "Waits if it is still running"),
+            ("cancel [#]", "Cancel a running job", ""),
             ("clear", "Clear screen", ""),
             ("quit", "Exit NaviDuck", ""),
             ("^X or Ctrl+X", "Exit immediately", "Quits even during operations")
         ]
         
-        print(f"\n{Colors.INFO}{self.state.get_icon('INFO')}  Available Commands:{Colors.RESET}")
+        print(f"\n{Colors.INFO}{self.state.get_icon('INFO')}  Available Commands:{Colors.RESET}", file=screen)
         for cmd, desc, extra in commands:
-            print(f"  {Colors.CYAN}{cmd:25}{Colors.RESET} {desc}")
+            print(f"  {Colors.CYAN}{cmd:25}{Colors.RESET} {desc}", file=screen)
             if extra:
-                print(f"    {Colors.GRAY}{extra}{Colors.RESET}")
-        
-        print(f"\n{Colors.INFO}{self.state.get_icon('SEARCH')}  Search Examples:{Colors.RESET}")
-        print(f"  {Colors.CYAN}s python tutorials{Colors.RESET}")
-        print(f"  {Colors.CYAN}search wikipedia machine learning{Colors.RESET}")
-        print(f"  {Colors.CYAN}ai what is python{Colors.RESET}")
-        print(f"  {Colors.CYAN}go https://example.com{Colors.RESET}")
-        print(f"  {Colors.CYAN}open https://github.com{Colors.RESET}")
-        print(f"  {Colors.CYAN}open 1 (opens 1st result from last search){Colors.RESET}")
-        print(f"\n{Colors.WARNING}{self.state.get_icon('WARNING')}  Quick Exit:{Colors.RESET}")
-        print(f"  {Colors.CYAN}Press Ctrl+X{Colors.RESET} or {Colors.CYAN}type ^X{Colors.RESET} to quit immediately, even during searches or page loads")
-    
-    def show_results(self, results):
-        """Show search results and allow selection"""
+                print(f"    {Colors.GRAY}{extra}{Colors.RESET}", file=screen)
+        
+        print(f"\n{Colors.INFO}{self.state.get_icon('SEARCH')}  Search Examples:{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}s python tutorials{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}search wikipedia machine learning{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}search all rust async runtimes{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}ai what is python{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}go https://example.com{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}open https://github.com{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}open 1 (opens 1st result from last search){Colors.RESET}", file=screen)
+        print(f"\n{Colors.WARNING}{self.state.get_icon('WARNING')}  Quick Exit:{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}Press Ctrl+X{Colors.RESET} or {Colors.CYAN}type ^X{Colors.RESET} to quit immediately, even during searches or page loads", file=screen)
+    
+    def show_results(self, results, prefetch=True):
+        """Show search results and allow selection.
+
+        ``prefetch=False`` skips warming the top results, for lists that
+        were not just searched (e.g. a restored session)."""
         if not results:
             self.print_warning("No results found")
             return None
@@ -1151,36 +3905,37 @@ class UIManager:
         # Store results for later use
         self.last_results = results
         
-        print_header(f"{self.state.get_icon('SEARCH')}  Search Results ({len(results)} found)")
-        
-        for i, result in enumerate(results[:10], 1):
-            # Check exit flag
-            check_exit_flag()
+        with ScreenBuffer() as screen:
+            print_header(f"{self.state.get_icon('SEARCH')}  Search Results ({len(results)} found)", file=screen)
+            
+            separator = f"     {Colors.GRAY}{'─' * 60}{Colors.RESET}"
+            for i, result in enumerate(results[:10], 1):
+                # Check exit flag
+                check_exit_flag()
+            
+                engine_icon = self.state.get_icon(result.get('engine', 'SEARCH'))
+                title = result['title']
+                url_display = result['url'][:60] + ("..." if len(result['url']) > 60 else "")
             
-            engine_icon = self.state.get_icon(result.get('engine', 'SEARCH'))
-            title = result['title']
-            url_display = result['url'][:60] + ("..." if len(result['url']) > 60 else "")
+                print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {engine_icon} {title}", file=screen)
+                print(f"     {Colors.URL}{url_display}{Colors.RESET}", file=screen)
+                if result.get('snippet'):
+                    print(f"     {Colors.GRAY}{result['snippet']}{Colors.RESET}", file=screen)
             
-            print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {engine_icon} {title}")
-            print(f"     {Colors.URL}{url_display}{Colors.RESET}")
-            if result.get('snippet'):
-                print(f"     {Colors.GRAY}{result['snippet']}{Colors.RESET}")
+                if i < min(10, len(results)):
+                    print(separator, file=screen)
             
-            if i < min(10, len(results)):
-                print(f"     {Colors.GRAY}{'─' * 60}{Colors.RESET}")
+            self.show_result_options(results, screen=screen)
+        
+        # Fetch the likely picks while the list is being read
+        if prefetch:
+            self.prefetcher.start(results)
         
         # Interactive selection
         while True:
             # Check exit flag
             check_exit_flag()
             
-            print(f"\n{Colors.INFO}{self.state.get_icon('LINK')}  Select an option:{Colors.RESET}")
-            print(f"  {Colors.CYAN}1-{min(10, len(results))}{Colors.RESET} - Open result in NaviDuck")
-            print(f"  {Colors.CYAN}o1-o{min(10, len(results))}{Colors.RESET} - Open result in browser")
-            print(f"  {Colors.CYAN}b{Colors.RESET} - Bookmark first result")
-            print(f"  {Colors.CYAN}Enter{Colors.RESET} - Return to search")
-            print(f"  {Colors.CYAN}^X{Colors.RESET} - Quit immediately")
-            
             choice = get_input("Your choice")
             
             if choice is None:  # Ctrl+X was pressed
@@ -1195,6 +3950,7 @@ class UIManager:
                 # Bookmark first result
                 if results:
                     self.state.add_bookmark(results[0]['title'], results[0]['url'])
+                    self.archive_bookmark(results[0]['url'])
                     self.print_success(f"Bookmarked: {results[0]['title'][:40]}")
                 return None
             
@@ -1223,38 +3979,28 @@ class UIManager:
                         self.print_error(f"Please enter 1-{min(10, len(results))}")
                 except ValueError:
                     self.print_error("Please enter a valid number or command")
+            
+            self.show_result_options(results)
+    
+    @buffered
+    def show_result_options(self, results, screen=None):
+        count = min(10, len(results))
+        print(f"\n{Colors.INFO}{self.state.get_icon('LINK')}  Select an option:{Colors.RESET}", file=screen)
+        print(f"  {Colors.CYAN}1-{count}{Colors.RESET} - Open result in NaviDuck", file=screen)
+        print(f"  {Colors.CYAN}o1-o{count}{Colors.RESET} - Open result in browser", file=screen)
+        print(f"  {Colors.CYAN}b{Colors.RESET} - Bookmark first result", file=screen)
+        print(f"  {Colors.CYAN}Enter{Colors.RESET} - Return to search", file=screen)
+        print(f"  {Colors.CYAN}^X{Colors.RESET} - Quit immediately", file=screen)
     
     def show_page(self, page_data):
-        """Show webpage content in a nice format"""
+        """Show webpage content one screen at a time"""
         if 'error' in page_data:
             self.print_error(page_data['error'])
             return
         
-        print_header(f"{self.state.get_icon('PAGE')}  {page_data.get('title', 'Page Content')}")
-        
-        print(f"{Colors.INFO}{self.state.get_icon('LINK')}  URL: {Colors.URL}{self.state.current_url}{Colors.RESET}")
-        if page_data.get('tor'):
-            print(f"{Colors.INFO}{self.state.get_icon('TOR')}  Loaded via Tor{Colors.RESET}")
-        
-        print_box(
-            page_data.get('content', 'No content available'),
-            title="Page Content",
-            color=Colors.INFO
-        )
-        
-        # Actions menu
-        print(f"\n{Colors.INFO}{self.state.get_icon('MENU')}  Page Actions:{Colors.RESET}")
-        actions = [
-            ("b", "Bookmark this page"),
-            ("o", "Open in browser"),
-            ("s", "Search related"),
-            ("h", "Back to history"),
-            ("q", "Return to main"),
-            ("^X", "Quit immediately")
-        ]
-        
-        for key, desc in actions:
-            print(f"  {Colors.CYAN}{key}{Colors.RESET} - {desc}")
+        pager = Pager(page_data.get('content') or 'No content available')
+        self.state.current_scroll = pager.clamp(self.state.current_scroll)
+        self.render_page(page_data, pager)
         
         while True:
             # Check exit flag
@@ -1270,13 +4016,50 @@ class UIManager:
                 
             choice = choice.lower()
             
-            if choice == 'b':
+            if choice == 'n':
+                top = self.state.current_scroll + pager.height
+                if pager.offset(top) is None:
+                    self.print_info("End of page")
+                    continue
+                self.state.current_scroll = top
+                self.render_page(page_data, pager, clear=True)
+                continue
+            
+            elif choice == 'p':
+                if self.state.current_scroll == 0:
+                    self.print_info("Top of page")
+                    continue
+                self.state.current_scroll = max(0, self.state.current_scroll - pager.height)
+                self.render_page(page_data, pager, clear=True)
+                continue
+            
+            elif choice.startswith('/'):
+                top = pager.find(choice[1:].strip(), self.state.current_scroll)
+                if top is None:
+                    self.print_info(f"Not found: {pager.last_search}" if pager.last_search else "Usage: /text")
+                    continue
+                self.state.current_scroll = top
+                self.render_page(page_data, pager, clear=True)
+                continue
+            
+            elif choice == 'b':
                 title = get_input("Bookmark title", page_data.get('title', 'Untitled'))
                 if title:
                     self.state.add_bookmark(title, self.state.current_url)
+                    self.archive_bookmark(self.state.current_url)
                     self.print_success("Bookmarked!")
                 break
             
+            elif choice == 'l':
+                link = self.show_links(page_data.get('links', []))
+                if link:
+                    new_page = self.run_load(link['url'])
+                    if new_page and 'success' in new_page:
+                        self.show_page(new_page)
+                    else:
+                        self.print_error(new_page.get('error', 'Failed to load page'))
+                break
+            
             elif choice == 'o':
                 webbrowser.open(self.state.current_url)
                 self.print_success("Opened in browser")
@@ -1285,76 +4068,189 @@ class UIManager:
             elif choice == 's':
                 related = get_input("Search for related content")
                 if related:
-                    results = self.search_mgr.search(related, self.state.current_engine)
+                    results = self.run_search(related, self.state.current_engine)
                     selected = self.show_results(results)
                     if selected:
-                        page_data = self.page_loader.load_page(selected['url'], display=True)
+                        page_data = self.run_load(selected['url'])
                         if page_data and 'success' in page_data:
                             self.show_page(page_data)
                 break
             
-            elif choice == 'h':
-                self.show_history()
-                break
+            elif choice == 'h':
+                self.show_history()
+                break
+            
+            elif choice in ['q', '']:
+                break
+            
+            else:
+                self.print_error("Invalid choice")
+    
+    @profiled("ui.page")
+    @buffered
+    def render_page(self, page_data, pager, clear=False, screen=None):
+        """Draw the screen of the page starting at the current scroll position"""
+        if clear:
+            # Same write as the redraw, so the screen never shows blank
+            clear_screen(file=screen)
+        top = self.state.current_scroll
+        lines = pager.screen(top)
+        if pager.last_search:
+            match = re.compile(re.escape(pager.last_search), re.IGNORECASE)
+            # Pad first: colour codes would throw off the frame's ljust
+            lines = [match.sub(lambda m: f"{Colors.HIGHLIGHT}{m.group(0)}{Colors.RESET}{Colors.INFO}",
+                               line.ljust(pager.width)) for line in lines]
+        
+        print_header(f"{self.state.get_icon('PAGE')}  {page_data.get('title', 'Page Content')}", file=screen)
+        
+        print(f"{Colors.INFO}{self.state.get_icon('LINK')}  URL: {Colors.URL}{self.state.current_url}{Colors.RESET}", file=screen)
+        if page_data.get('tor'):
+            print(f"{Colors.INFO}{self.state.get_icon('TOR')}  Loaded via Tor{Colors.RESET}", file=screen)
+        if page_data.get('archived'):
+            print(f"{Colors.INFO}{self.state.get_icon('SAVE')}  Archived copy from {page_data['archived'][:16].replace('T', ' ')}{Colors.RESET}", file=screen)
+        
+        print_lines(lines, title="Page Content", color=Colors.INFO, file=screen)
+        print(f"{Colors.GRAY}  Lines {top + 1}-{top + len(lines)} · {pager.progress(top):.0%}{Colors.RESET}", file=screen)
+        
+        # Actions menu
+        print(f"\n{Colors.INFO}{self.state.get_icon('MENU')}  Page Actions:{Colors.RESET}", file=screen)
+        actions = [
+            ("n/p", "Next / previous screen"),
+            ("/text", "Find text (/ alone: next match)"),
+            ("b", "Bookmark this page"),
+            ("l", f"Show links ({len(page_data.get('links', []))})"),
+            ("o", "Open in browser"),
+            ("s", "Search related"),
+            ("h", "Back to history"),
+            ("q", "Return to main"),
+            ("^X", "Quit immediately")
+        ]
+        
+        for key, desc in actions:
+            print(f"  {Colors.CYAN}{key}{Colors.RESET} - {desc}", file=screen)
+    
+    def show_links(self, links):
+        """List links found on the current page and return the chosen one"""
+        if not links:
+            self.print_info("No links found on this page")
+            return None
+        
+        with ScreenBuffer() as screen:
+            print_header(f"{self.state.get_icon('LINK')}  Links ({len(links)} found)", file=screen)
+            for i, link in enumerate(links[:30], 1):
+                text = link['text'] or link['url']
+                print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {text[:60]}", file=screen)
+                print(f"     {Colors.URL}{link['url'][:70]}{Colors.RESET}", file=screen)
+        
+        choice = get_input(f"Open link (1-{min(30, len(links))}) or Enter to return")
+        if not choice:
+            return None
+        
+        try:
+            idx = int(choice) - 1
+            if 0 <= idx < min(30, len(links)):
+                return links[idx]
+        except ValueError:
+            pass
+        self.print_error("Invalid selection")
+        return None
+    
+    def find_history(self, terms):
+        """Full-text search over the text of visited pages"""
+        started = time.perf_counter()
+        matches = self.state.store.find(terms)
+        elapsed = (time.perf_counter() - started) * 1000
+        
+        if not matches:
+            self.print_info(f"No visited page matches '{terms}'")
+            return
+        
+        with ScreenBuffer() as screen:
+            print_header(f"{self.state.get_icon('HISTORY')}  History matches for: {terms}", file=screen)
+            
+            for i, match in enumerate(matches, 1):
+                title = match.get('title') or match['url'][:60]
+                snippet = match.get('snippet', '').replace('\n', ' ')
+                snippet = snippet.replace('\x02', Colors.HIGHLIGHT).replace('\x03', Colors.RESET + Colors.GRAY)
             
-            elif choice in ['q', '']:
-                break
+                print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {self.state.get_icon('PAGE')} {title}", file=screen)
+                print(f"     {Colors.URL}{match['url'][:70]}{Colors.RESET}", file=screen)
+                if snippet:
+                    print(f"     {Colors.GRAY}{snippet}{Colors.RESET}", file=screen)
+                print(f"     {Colors.GRAY}{match['visited'][:10]} · {match['visits']} visit(s){Colors.RESET}", file=screen)
             
-            else:
-                self.print_error("Invalid choice")
+            self.print_info(f"{len(matches)} matches in {elapsed:.1f} ms", file=screen)
+        
+        choice = get_input(f"Open page (1-{len(matches)}) or Enter to return")
+        if choice is None:  # Ctrl+X was pressed
+            raise KeyboardInterrupt("Ctrl+X pressed")
+        
+        if choice:
+            try:
+                idx = int(choice) - 1
+                if 0 <= idx < len(matches):
+                    page_data = self.run_load(matches[idx]['url'])
+                    if page_data and 'success' in page_data:
+                        self.show_page(page_data)
+            except:
+                self.print_error("Invalid selection")
     
     def show_history(self):
-        if not self.state.history:
+        entries = self.state.store.recent(15)
+        if not entries:
             self.print_info("No browsing history")
             return
         
-        print_header(f"{self.state.get_icon('HISTORY')}  Browsing History")
-        
-        items = []
-        for i, entry in enumerate(reversed(self.state.history[-15:]), 1):
-            # Check exit flag
-            check_exit_flag()
+        with ScreenBuffer() as screen:
+            print_header(f"{self.state.get_icon('HISTORY')}  Browsing History", file=screen)
+            
+            archived = self.archived_urls(entry['url'] for entry in entries if entry['type'] == 'visit')
+            separator = f"     {Colors.GRAY}{'─' * 50}{Colors.RESET}"
+            items = []
+            for i, entry in enumerate(entries, 1):
+                # Check exit flag
+                check_exit_flag()
             
-            time_str = entry['timestamp'][11:16]
-            date_str = entry['timestamp'][:10]
+                time_str = entry['timestamp'][11:16]
+                date_str = entry['timestamp'][:10]
             
-            if entry['type'] == 'search':
-                icon = self.state.get_icon('SEARCH')
-                engine_icon = self.state.get_icon(SEARCH_ENGINES[entry.get('engine', 'brave')]['icon'])
-                text = f"{entry.get('query', '')[:40]}"
-                items.append(f"{icon} {engine_icon} {text}")
-                print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {icon} {engine_icon} {text}")
-            else:
-                icon = self.state.get_icon('PAGE')
-                text = entry.get('title', entry.get('url', '')[:40])
-                items.append(f"{icon} {text}")
-                print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {icon} {text}")
+                if entry['type'] == 'search':
+                    icon = self.state.get_icon('SEARCH')
+                    engine_icon = self.state.get_engine_icon(entry.get('engine', 'brave'))
+                    text = f"{entry.get('query', '')[:40]}"
+                    items.append(f"{icon} {engine_icon} {text}")
+                    print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {icon} {engine_icon} {text}", file=screen)
+                else:
+                    icon = self.state.get_icon('PAGE')
+                    text = entry.get('title', entry.get('url', '')[:40])
+                    items.append(f"{icon} {text}")
+                    print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {icon} {text}", file=screen)
             
-            print(f"     {Colors.GRAY}{date_str} {time_str}{Colors.RESET}")
+                saved = f" · {self.state.get_icon('SAVE')} archived" if entry.get('url') in archived else ""
+                print(f"     {Colors.GRAY}{date_str} {time_str}{saved}{Colors.RESET}", file=screen)
             
-            if i < min(15, len(self.state.history)):
-                print(f"     {Colors.GRAY}{'─' * 50}{Colors.RESET}")
+                if i < len(entries):
+                    print(separator, file=screen)
         
         # Allow selection
-        choice = get_input(f"Open item (1-{min(15, len(self.state.history))}) or Enter to return")
+        choice = get_input(f"Open item (1-{len(entries)}) or Enter to return")
         if choice is None:  # Ctrl+X was pressed
             raise KeyboardInterrupt("Ctrl+X pressed")
         
         if choice:
             try:
                 idx = int(choice) - 1
-                history_idx = len(self.state.history) - 1 - idx
-                if 0 <= history_idx < len(self.state.history):
-                    entry = self.state.history[history_idx]
+                if 0 <= idx < len(entries):
+                    entry = entries[idx]
                     if entry['type'] == 'search':
-                        results = self.search_mgr.search(entry.get('query', ''), entry.get('engine', 'brave'))
+                        results = self.run_search(entry.get('query', ''), entry.get('engine', 'brave'))
                         selected = self.show_results(results)
                         if selected:
-                            page_data = self.page_loader.load_page(selected['url'], display=True)
+                            page_data = self.run_load(selected['url'])
                             if page_data and 'success' in page_data:
                                 self.show_page(page_data)
                     elif entry['type'] == 'visit':
-                        page_data = self.page_loader.load_page(entry['url'], display=True)
+                        page_data = self.run_load(entry['url'])
                         if page_data and 'success' in page_data:
                             self.show_page(page_data)
             except:
@@ -1364,7 +4260,7 @@ class UIManager:
         """Handle AI queries"""
         print_header(f"{self.state.get_icon('AI')}  NavAI")
         
-        response = self.ai.ask(query)
+        response = self.core.run("ai", query, self.ai.ask, query)
         print_box(response, title="NavAI Response", color=Colors.MAGENTA)
         
         # Suggest follow-up
@@ -1379,29 +4275,30 @@ class UIManager:
         choice = choice.lower()
         
         if choice == 'y':
-            results = self.search_mgr.search(query, self.state.current_engine)
+            results = self.run_search(query, self.state.current_engine)
             selected = self.show_results(results)
             if selected:
-                page_data = self.page_loader.load_page(selected['url'], display=True)
+                page_data = self.run_load(selected['url'])
                 if page_data and 'success' in page_data:
                     self.show_page(page_data)
     
     def show_settings(self):
         """Show settings menu with icon toggle option"""
-        print_header(f"{self.state.get_icon('SETTINGS')}  Settings")
-        
-        print(f"\n{Colors.INFO}Current Configuration:{Colors.RESET}")
-        print(f"  {self.state.get_icon('SEARCH')}  Default Engine: {Colors.HIGHLIGHT}{SEARCH_ENGINES[self.state.current_engine]['name']}{Colors.RESET}")
-        print(f"  {self.state.get_icon('TOR')}  Tor: {Colors.HIGHLIGHT}{'ON' if self.state.tor_enabled else 'OFF'}{Colors.RESET}")
-        print(f"  {self.state.get_icon('SETTINGS')}  Icons: {Colors.HIGHLIGHT}{'Emoji' if self.state.use_emoji else 'Nerd Font'}{Colors.RESET}")
-        
-        print(f"\n{Colors.INFO}Options:{Colors.RESET}")
-        print(f"  1. Change default search engine")
-        print(f"  2. Manage search engines")
-        print(f"  3. Toggle icons (Emoji/Nerd Font)")
-        print(f"  4. Clear history")
-        print(f"  5. Clear bookmarks")
-        print(f"  6. Back to main")
+        with ScreenBuffer() as screen:
+            print_header(f"{self.state.get_icon('SETTINGS')}  Settings", file=screen)
+            
+            print(f"\n{Colors.INFO}Current Configuration:{Colors.RESET}", file=screen)
+            print(f"  {self.state.get_icon('SEARCH')}  Default Engine: {Colors.HIGHLIGHT}{SEARCH_ENGINES[self.state.current_engine]['name']}{Colors.RESET}", file=screen)
+            print(f"  {self.state.get_icon('TOR')}  Tor: {Colors.HIGHLIGHT}{'ON' if self.state.tor_enabled else 'OFF'}{Colors.RESET}", file=screen)
+            print(f"  {self.state.get_icon('SETTINGS')}  Icons: {Colors.HIGHLIGHT}{'Emoji' if self.state.use_emoji else 'Nerd Font'}{Colors.RESET}", file=screen)
+            
+            print(f"\n{Colors.INFO}Options:{Colors.RESET}", file=screen)
+            print(f"  1. Change default search engine", file=screen)
+            print(f"  2. Manage search engines", file=screen)
+            print(f"  3. Toggle icons (Emoji/Nerd Font)", file=screen)
+            print(f"  4. Clear history", file=screen)
+            print(f"  5. Clear bookmarks", file=screen)
+            print(f"  6. Back to main", file=screen)
         
         choice = get_input("Select option")
         
@@ -1417,14 +4314,12 @@ class UIManager:
         elif choice == '4':
             confirm = get_input("Clear all history? (y/N)", "n")
             if confirm and confirm.lower() == 'y':
-                self.state.history = []
-                self.state.save_data()
+                self.state.store.clear_history()
                 self.print_success("History cleared")
         elif choice == '5':
             confirm = get_input("Clear all bookmarks? (y/N)", "n")
             if confirm and confirm.lower() == 'y':
-                self.state.bookmarks = []
-                self.state.save_data()
+                self.state.store.clear_bookmarks()
                 self.print_success("Bookmarks cleared")
         elif choice == '6':
             return
@@ -1476,10 +4371,10 @@ class UIManager:
                 return True
             
             query = " ".join(args)
-            results = self.search_mgr.search(query, self.state.current_engine)
+            results = self.run_search(query, self.state.current_engine)
             selected = self.show_results(results)
             if selected:
-                page_data = self.page_loader.load_page(selected['url'], display=True)
+                page_data = self.run_load(selected['url'])
                 if page_data and 'success' in page_data:
                     self.show_page(page_data)
             return True
@@ -1492,7 +4387,7 @@ class UIManager:
             engine = self.state.current_engine
             query_parts = args
             
-            if args[0] in SEARCH_ENGINES:
+            if args[0] in SEARCH_ENGINES or args[0] == "all":
                 engine = args[0]
                 query_parts = args[1:]
             
@@ -1501,10 +4396,10 @@ class UIManager:
                 return True
             
             query = " ".join(query_parts)
-            results = self.search_mgr.search(query, engine)
+            results = self.run_search(query, engine)
             selected = self.show_results(results)
             if selected:
-                page_data = self.page_loader.load_page(selected['url'], display=True)
+                page_data = self.run_load(selected['url'])
                 if page_data and 'success' in page_data:
                     self.show_page(page_data)
             return True
@@ -1518,7 +4413,7 @@ class UIManager:
             if not url.startswith(("http://", "https://")):
                 url = "https://" + url
             
-            page_data = self.page_loader.load_page(url, display=True)
+            page_data = self.run_load(url)
             if 'error' in page_data:
                 self.print_error(page_data['error'])
             else:
@@ -1555,29 +4450,68 @@ class UIManager:
                 self.print_success(f"Opening in browser: {url[:50]}")
             return True
         
+        elif cmd == "bg":
+            self.start_background_job(args)
+            return True
+        
+        elif cmd == "jobs":
+            self.show_jobs()
+            return True
+        
+        elif cmd == "fg":
+            if not args or not args[0].isdigit():
+                self.print_error("Usage: fg [job number]")
+                return True
+            self.foreground_job(int(args[0]))
+            return True
+        
+        elif cmd == "cancel":
+            if not args or not args[0].isdigit():
+                self.print_error("Usage: cancel [job number]")
+                return True
+            job = self.core.get(int(args[0]))
+            if not job:
+                self.print_error(f"No job #{args[0]}")
+            elif job.status != "running":
+                self.print_info(f"Job #{job.id} already {job.status}")
+            else:
+                self.core.cancel(job)
+                self.print_success(f"Cancelled job #{job.id}")
+            return True
+        
         elif cmd == "history":
-            self.show_history()
+            if args and args[0].lower() == "find":
+                if len(args) < 2:
+                    self.print_error("Usage: history find [terms]")
+                    return True
+                self.find_history(" ".join(args[1:]))
+            else:
+                self.show_history()
             return True
         
         elif cmd == "bookmarks":
-            if not self.state.bookmarks:
+            bookmarks = self.state.store.bookmarks()
+            if not bookmarks:
                 self.print_info("No bookmarks saved")
                 return True
             
-            print_header(f"{self.state.get_icon('BOOKMARK')}  Bookmarks")
-            for i, bm in enumerate(self.state.bookmarks, 1):
-                print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {self.state.get_icon('BOOKMARK')} {bm['title']}")
-                print(f"     {Colors.GRAY}{bm['url']}{Colors.RESET}")
+            with ScreenBuffer() as screen:
+                print_header(f"{self.state.get_icon('BOOKMARK')}  Bookmarks", file=screen)
+                archived = self.archived_urls(bm['url'] for bm in bookmarks)
+                for i, bm in enumerate(bookmarks, 1):
+                    saved = f" {self.state.get_icon('SAVE')}" if bm['url'] in archived else ""
+                    print(f"{Colors.CYAN}{i:2d}.{Colors.RESET} {self.state.get_icon('BOOKMARK')} {bm['title']}{saved}", file=screen)
+                    print(f"     {Colors.GRAY}{bm['url']}{Colors.RESET}", file=screen)
             
-            choice = get_input(f"Open bookmark (1-{len(self.state.bookmarks)}) or Enter to return")
+            choice = get_input(f"Open bookmark (1-{len(bookmarks)}) or Enter to return")
             if choice is None:  # Ctrl+X was pressed
                 raise KeyboardInterrupt("Ctrl+X pressed")
             
             if choice:
                 try:
                     idx = int(choice) - 1
-                    if 0 <= idx < len(self.state.bookmarks):
-                        page_data = self.page_loader.load_page(self.state.bookmarks[idx]['url'], display=True)
+                    if 0 <= idx < len(bookmarks):
+                        page_data = self.run_load(bookmarks[idx]['url'])
                         if 'error' in page_data:
                             self.print_error(page_data['error'])
                         else:
@@ -1608,8 +4542,28 @@ class UIManager:
             self.show_engines()
             return True
         
+        elif cmd == "cache":
+            self.show_cache(args)
+            return True
+        
+        elif cmd == "archive":
+            self.show_archive(args)
+            return True
+        
+        elif cmd == "session":
+            self.manage_sessions(args)
+            return True
+        
+        elif cmd == "health":
+            self.show_health(args)
+            return True
+        
+        elif cmd == "stats":
+            self.show_stats(args)
+            return True
+        
         elif cmd == "clear":
-            clear_screen()
+            # show_main_menu() clears the screen in the same write
             self.show_main_menu()
             return True
         
@@ -1619,7 +4573,6 @@ class UIManager:
         
         elif cmd in ["quit", "exit", "q", ":q", "^x", "^X"]:
             print(f"\n{Colors.SUCCESS}{self.state.get_icon('SUCCESS')}  Goodbye!{Colors.RESET}")
-            self.state.save_data()
             self.state.save_config()
             return False
         
@@ -1638,10 +4591,10 @@ class UIManager:
                     self.handle_ai_query(query)
                 else:
                     # Default to search
-                    results = self.search_mgr.search(query, self.state.current_engine)
+                    results = self.run_search(query, self.state.current_engine)
                     selected = self.show_results(results)
                     if selected:
-                        page_data = self.page_loader.load_page(selected['url'], display=True)
+                        page_data = self.run_load(selected['url'])
                         if page_data and 'success' in page_data:
                             self.show_page(page_data)
                 return True
@@ -1650,6 +4603,291 @@ class UIManager:
                 self.print_info("Type 'help' for available commands")
                 return True
     
+    def start_background_job(self, args):
+        """Start 's', 'search', 'go' or 'ai' as a quiet background job"""
+        if len(args) < 2:
+            self.print_error("Usage: bg [s|search|go|ai] ...")
+            self.print_info("Example: bg s python asyncio")
+            return
+        
+        kind = args[0].lower()
+        rest = args[1:]
+        
+        if self.state.offline and kind != "go":
+            self.print_warning("Offline: only 'bg go' works without the network")
+            return
+        
+        if kind in ("s", "search"):
+            engine = self.state.current_engine
+            if kind == "search" and (rest[0] in SEARCH_ENGINES or rest[0] == "all") and len(rest) > 1:
+                engine = rest[0]
+                rest = rest[1:]
+            query = " ".join(rest)
+            job = self.core.submit("search", query, self.search_mgr.search, query, engine,
+                                   quiet=True, on_done=self.job_finished)
+        elif kind == "go":
+            url = rest[0]
+            if not url.startswith(("http://", "https://")):
+                url = "https://" + url
+            job = self.core.submit("page", url, self.page_loader.fetch_page, url,
+                                   quiet=True, on_done=self.job_finished)
+        elif kind == "ai":
+            question = " ".join(rest)
+            job = self.core.submit("ai", question, self.ai.ask, question,
+                                   quiet=True, on_done=self.job_finished)
+        else:
+            self.print_error("Only s, search, go and ai can run in the background")
+            return
+        
+        self.print_success(f"Started job #{job.id}: {job.kind} {job.description[:40]}")
+        self.print_info("Keep browsing - 'jobs' lists progress, 'fg #' shows the result")
+    
+    def job_finished(self, job):
+        """Runs on the core thread when a background job ends"""
+        if job.status == "done":
+            print(f"\n{Colors.SUCCESS}{self.state.get_icon('SUCCESS')} Job #{job.id} finished: "
+                  f"{job.kind} {job.description[:40]} - type 'fg {job.id}'{Colors.RESET}")
+        elif job.status == "failed":
+            print(f"\n{Colors.ERROR}{self.state.get_icon('ERROR')} Job #{job.id} failed: {job.future.exception()}{Colors.RESET}")
+    
+    @buffered
+    def show_jobs(self, screen=None):
+        jobs = self.core.list_jobs()
+        if not jobs:
+            self.print_info("No jobs yet - start one with 'bg s [query]'", file=screen)
+            return
+        
+        print_header(f"{self.state.get_icon('LOADING')}  Jobs", file=screen)
+        status_colors = {"running": Colors.INFO, "done": Colors.SUCCESS, "failed": Colors.ERROR, "cancelled": Colors.GRAY}
+        for job in jobs[-15:]:
+            color = status_colors.get(job.status, Colors.INFO)
+            print(f"{Colors.CYAN}{job.id:3d}.{Colors.RESET} {color}{job.status:9}{Colors.RESET} "
+                  f"{job.kind:6} {job.description[:40]:40} {Colors.GRAY}{job.elapsed:.1f}s{Colors.RESET}", file=screen)
+    
+    def foreground_job(self, job_id):
+        """Wait for a job if needed, then show its result"""
+        job = self.core.get(job_id)
+        if not job:
+            self.print_error(f"No job #{job_id}")
+            return
+        if job.status == "cancelled":
+            self.print_info(f"Job #{job.id} was cancelled")
+            self.core.forget(job)
+            return
+        
+        try:
+            result = self.core.wait(job)
+        finally:
+            # Shown (or failed) once; the result need not stay in memory
+            self.core.forget(job)
+        
+        if job.kind == "search":
+            selected = self.show_results(result)
+            if selected:
+                page_data = self.run_load(selected['url'])
+                if page_data and 'success' in page_data:
+                    self.show_page(page_data)
+        elif job.kind == "page":
+            self.page_loader.record_visit(result)
+            self.show_page(result)
+        else:
+            print_box(result, title="NavAI Response", color=Colors.MAGENTA)
+    
+    @buffered
+    def show_stats(self, args, screen=None):
+        """Profiler control and per-stage timing breakdown"""
+        subcmd = args[0].lower() if args else ""
+        if subcmd == "on":
+            PROFILER.enabled = True
+            self.print_success("Profiling on - run some searches, then type 'stats'", file=screen)
+            return
+        if subcmd == "off":
+            PROFILER.enabled = False
+            self.print_success("Profiling off", file=screen)
+            return
+        if subcmd == "reset":
+            PROFILER.reset()
+            self.print_success("Timings cleared", file=screen)
+            return
+        if subcmd == "trace":
+            path = os.path.expanduser(args[1]) if len(args) > 1 else "naviduck_trace.json"
+            try:
+                count = PROFILER.write_trace(path)
+                self.print_success(f"Wrote {count} spans to {path} (open in chrome://tracing or ui.perfetto.dev)", file=screen)
+            except OSError as e:
+                self.print_error(f"Cannot write trace: {e}", file=screen)
+            return
+        
+        print_header(f"{self.state.get_icon('SETTINGS')}  Pipeline Timings", file=screen)
+        if not PROFILER.stats():
+            state = "on" if PROFILER.enabled else "off"
+            self.print_info(f"No timings yet (profiling is {state}; 'stats on' to enable)", file=screen)
+            return
+        
+        lines = profile_report()
+        print(f"  {Colors.HIGHLIGHT}{lines[0]}{Colors.RESET}", file=screen)
+        for line in lines[1:]:
+            print(f"  {line}", file=screen)
+        self.print_info("Stages nest: net.* runs inside search.engine and page.fetch", file=screen)
+    
+    @buffered
+    def show_health(self, args, screen=None):
+        """Show per-engine health, or reset it"""
+        health = self.search_mgr.health
+        if args and args[0].lower() == "reset":
+            engine = args[1] if len(args) > 1 else None
+            health.reset(engine)
+            self.print_success(f"Health stats reset for {SEARCH_ENGINES[engine]['name'] if engine in SEARCH_ENGINES else 'all engines'}", file=screen)
+            return
+        
+        print_header(f"{self.state.get_icon('SETTINGS')}  Engine Health", file=screen)
+        print(f"  {'Engine':16} {'State':12} {'Reqs':>5} {'p50':>7} {'p90':>7} {'Errors':>7} {'CAPTCHA':>8}", file=screen)
+        
+        ranked = health.rank(SEARCH_ENGINES)
+        for engine in ranked + [e for e in SEARCH_ENGINES if e not in ranked]:
+            stats = health.stats(engine)
+            if not SEARCH_ENGINES[engine]['enabled']:
+                state_text, color = "disabled", Colors.GRAY
+            elif stats['open_for']:
+                state_text, color = f"off {stats['open_for'] / 60:.0f}m", Colors.ERROR
+            else:
+                state_text, color = "ok", Colors.SUCCESS
+            p50 = f"{stats['p50']:.2f}s" if stats['p50'] is not None else "-"
+            p90 = f"{stats['p90']:.2f}s" if stats['p90'] is not None else "-"
+            
+            print(f"  {self.state.get_engine_icon(engine)} {SEARCH_ENGINES[engine]['name']:14} {color}{state_text:12}{Colors.RESET} "
+                  f"{stats['samples']:5d} {p50:>7} {p90:>7} {stats['error_rate']:7.0%} {stats['captcha_rate']:8.0%}", file=screen)
+        
+        self.print_info("Engines are listed in fallback order. 'health reset [engine]' clears the stats", file=screen)
+    
+    def manage_sessions(self, args):
+        """session save/load/list/delete"""
+        subcmd = args[0].lower() if args else "list"
+        name = " ".join(args[1:])
+        
+        if subcmd in ("save", "load", "delete") and not name:
+            self.print_error(f"Usage: session {subcmd} [name]")
+            return
+        
+        try:
+            if subcmd == "save":
+                snapshot = {
+                    'engine': self.state.current_engine,
+                    'results': self.last_results or self.state.current_results,
+                    'page': self.state.current_page_data,
+                    'scroll': self.state.current_scroll
+                }
+                if not snapshot['results'] and not snapshot['page']:
+                    self.print_info("Nothing to save yet - search or open a page first")
+                    return
+                path, size = self.sessions.save(name, snapshot)
+                self.print_success(f"Session saved: {path} ({size / 1024:.1f} KB)")
+            
+            elif subcmd == "load":
+                snapshot = self.sessions.load(name)
+                if snapshot is None:
+                    self.print_error(f"No session named '{name}' - see 'session list'")
+                    return
+                self.restore_session(snapshot)
+            
+            elif subcmd == "delete":
+                if self.sessions.delete(name):
+                    self.print_success(f"Session '{name}' deleted")
+                else:
+                    self.print_error(f"No session named '{name}'")
+            
+            elif subcmd == "list":
+                sessions = self.sessions.list_sessions()
+                if not sessions:
+                    self.print_info("No saved sessions - use 'session save [name]'")
+                    return
+                print_header(f"{self.state.get_icon('BOOKMARK')}  Saved Sessions")
+                for session_name, saved, size in sessions:
+                    when = datetime.fromtimestamp(saved).strftime('%Y-%m-%d %H:%M')
+                    print(f"  {Colors.CYAN}{session_name:30}{Colors.RESET} {Colors.GRAY}{when}  {size / 1024:6.1f} KB{Colors.RESET}")
+            
+            else:
+                self.print_error("Usage: session [save|load|list|delete] [name]")
+        except (OSError, ValueError) as e:
+            self.print_error(f"Session {subcmd} failed: {e}")
+    
+    def restore_session(self, snapshot):
+        """Put a saved session back on screen without touching the network"""
+        if snapshot.get('engine') in SEARCH_ENGINES:
+            self.state.current_engine = snapshot['engine']
+        results = snapshot.get('results') or []
+        self.last_results = results
+        self.state.current_results = results
+        
+        saved = snapshot.get('saved', '')[:16].replace('T', ' ')
+        self.print_success(f"Restored session '{snapshot.get('name', '')}' from {saved}")
+        
+        page = snapshot.get('page')
+        if page:
+            self.state.current_url = page['url']
+            self.state.current_title = page['title'][:80]
+            self.state.current_page = page['content']
+            self.state.current_page_data = page
+            self.state.current_scroll = snapshot.get('scroll', 0)
+            self.show_page(page)
+        
+        # Then back to the saved result list, as if returning from the page.
+        # No prefetching: restoring a session should not touch the network.
+        if results:
+            selected = self.show_results(results, prefetch=False)
+            if selected:
+                page_data = self.run_load(selected['url'])
+                if page_data and 'success' in page_data:
+                    self.show_page(page_data)
+    
+    @buffered
+    def show_cache(self, args, screen=None):
+        """Show result cache statistics or clear it"""
+        cache = self.search_mgr.cache
+        if not cache:
+            self.print_info("Result cache is disabled", file=screen)
+            return
+        
+        if args and args[0].lower() == "clear":
+            cache.clear()
+            self.print_success("Result cache cleared", file=screen)
+            return
+        
+        stats = cache.stats()
+        print_header(f"{self.state.get_icon('SAVE')}  Result Cache", file=screen)
+        print(f"  Entries:  {Colors.HIGHLIGHT}{stats['entries']}/{stats['max_entries']}{Colors.RESET}", file=screen)
+        print(f"  Hits:     {Colors.HIGHLIGHT}{stats['hits']}{Colors.RESET}", file=screen)
+        print(f"  Misses:   {Colors.HIGHLIGHT}{stats['misses']}{Colors.RESET}", file=screen)
+        print(f"  Hit rate: {Colors.HIGHLIGHT}{stats['hit_rate']:.0%}{Colors.RESET}", file=screen)
+        print(f"  File:     {Colors.GRAY}{cache.cache_file}{Colors.RESET}", file=screen)
+    
+    @buffered
+    def show_archive(self, args, screen=None):
+        """Show offline archive statistics, switch archiving on or off, or clear it"""
+        subcmd = args[0].lower() if args else ""
+        if subcmd in ("on", "off"):
+            ARCHIVE['enabled'] = subcmd == "on"
+            self.state.save_config()
+            self.print_success(f"Archiving {'enabled' if ARCHIVE['enabled'] else 'disabled'}", file=screen)
+            if ARCHIVE['enabled']:
+                self.print_info("Pages you open are kept for --offline; Tor pages are never archived", file=screen)
+            return
+        if subcmd == "clear":
+            self.state.archive.clear()
+            self.print_success("Archive cleared", file=screen)
+            return
+        if subcmd:
+            self.print_error("Usage: archive [on|off|clear]", file=screen)
+            return
+        
+        stats = self.state.archive.stats()
+        print_header(f"{self.state.get_icon('SAVE')}  Page Archive", file=screen)
+        print(f"  Archiving: {Colors.HIGHLIGHT}{'ON' if ARCHIVE['enabled'] else 'OFF'}{Colors.RESET}", file=screen)
+        print(f"  Pages:     {Colors.HIGHLIGHT}{stats['pages']}{Colors.RESET} ({stats['pinned']} bookmarked)", file=screen)
+        print(f"  Blobs:     {Colors.HIGHLIGHT}{stats['blobs']}{Colors.RESET} (identical pages stored once)", file=screen)
+        print(f"  Size:      {Colors.HIGHLIGHT}{stats['bytes'] / 1048576:.1f} / {stats['max_bytes'] / 1048576:.0f} MB{Colors.RESET}", file=screen)
+        print(f"  Folder:    {Colors.GRAY}{self.state.archive_dir}{Colors.RESET}", file=screen)
+    
     def change_default_engine(self):
         print_header("Change Default Search Engine")
         
@@ -1670,24 +4908,25 @@ class UIManager:
             self.print_error("Invalid selection")
     
     def show_engines(self):
-        print_header(f"{self.state.get_icon('SEARCH')}  Search Engine Management")
-        
-        engines = list(SEARCH_ENGINES.keys())
-        
-        print(f"\n{Colors.INFO}Enabled engines marked with {self.state.get_icon('SUCCESS')}{Colors.RESET}")
-        for i, engine in enumerate(engines, 1):
-            config = SEARCH_ENGINES[engine]
-            icon = self.state.get_icon(config['icon'])
-            enabled = self.state.get_icon('SUCCESS') if config['enabled'] else " "
-            default = " (default)" if engine == self.state.current_engine else ""
+        with ScreenBuffer() as screen:
+            print_header(f"{self.state.get_icon('SEARCH')}  Search Engine Management", file=screen)
             
-            print(f"  {Colors.CYAN}{i:2d}.{Colors.RESET} {enabled} {icon} {config['name']}{default}")
-        
-        print(f"\n{Colors.INFO}Commands:{Colors.RESET}")
-        print(f"  {Colors.CYAN}enable [num]{Colors.RESET} - Enable engine")
-        print(f"  {Colors.CYAN}disable [num]{Colors.RESET} - Disable engine")
-        print(f"  {Colors.CYAN}set [num]{Colors.RESET} - Set as default")
-        print(f"  {Colors.CYAN}back{Colors.RESET} - Return")
+            engines = list(SEARCH_ENGINES.keys())
+            
+            print(f"\n{Colors.INFO}Enabled engines marked with {self.state.get_icon('SUCCESS')}{Colors.RESET}", file=screen)
+            for i, engine in enumerate(engines, 1):
+                config = SEARCH_ENGINES[engine]
+                icon = self.state.get_icon(config['icon'])
+                enabled = self.state.get_icon('SUCCESS') if config['enabled'] else " "
+                default = " (default)" if engine == self.state.current_engine else ""
+            
+                print(f"  {Colors.CYAN}{i:2d}.{Colors.RESET} {enabled} {icon} {config['name']}{default}", file=screen)
+            
+            print(f"\n{Colors.INFO}Commands:{Colors.RESET}", file=screen)
+            print(f"  {Colors.CYAN}enable [num]{Colors.RESET} - Enable engine", file=screen)
+            print(f"  {Colors.CYAN}disable [num]{Colors.RESET} - Disable engine", file=screen)
+            print(f"  {Colors.CYAN}set [num]{Colors.RESET} - Set as default", file=screen)
+            print(f"  {Colors.CYAN}back{Colors.RESET} - Return", file=screen)
         
         while True:
             # Check exit flag
@@ -1759,6 +4998,8 @@ class UIManager:
     
     def run(self):
         self.show_main_menu()
+        STARTUP.mark("main menu")
+        STARTUP.report()
         
         while True:
             try:
@@ -1786,26 +5027,386 @@ class UIManager:
             except Exception as e:
                 self.print_error(f"Unexpected error: {e}")
 
+# ==================== BATCH MODE ====================
+class BatchRunner:
+    """Runs queries from a file or stdin concurrently and streams JSON Lines"""
+    
+    def __init__(self, search_mgr, page_loader, engines, concurrency=8, pages=0, out=None):
+        self.search_mgr = search_mgr
+        self.page_loader = page_loader
+        self.engines = engines
+        self.concurrency = max(1, concurrency)
+        self.pages = pages
+        self.out = out or sys.stdout
+        self.out_lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+    
+    @staticmethod
+    def read_queries(stream):
+        for line in stream:
+            query = line.strip()
+            if query and not query.startswith('#'):
+                yield query
+    
+    def run(self, queries):
+        """Run every query on every engine; returns (lines written, failures)"""
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+        
+        executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="naviduck-batch")
+        pending = set()
+        
+        try:
+            for query in queries:
+                for engine in self.engines:
+                    # Keep the queue short so huge inputs are streamed, not loaded
+                    while len(pending) >= self.concurrency * 2:
+                        done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                        check_exit_flag()
+                    pending.add(executor.submit(self._run_one, query, engine))
+            
+            while pending:
+                _, pending = wait(pending, timeout=0.25)
+                check_exit_flag()
+        except KeyboardInterrupt:
+            set_exit_flag()
+            for future in pending:
+                future.cancel()
+            raise
+        finally:
+            executor.shutdown(wait=True)
+        
+        return self.written, self.failed
+    
+    def _run_one(self, query, engine):
+        JOB_CONTEXT.job = Job(0, "batch", query, quiet=True)
+        started = time.perf_counter()
+        record = {'query': query, 'engine': engine}
+        
+        try:
+            results, record['cache_hit'] = self.search_mgr.lookup(query, engine)
+            record['count'] = len(results)
+            # Copies: the result dicts are shared with the result cache
+            record['results'] = [dict(result) for result in results]
+            
+            for result in record['results'][:self.pages]:
+                check_exit_flag()
+                try:
+                    page = self.page_loader.fetch_page(result['url'])
+                    result['page'] = {'title': page['title'], 'content': page['content']}
+                except KeyboardInterrupt:
+                    raise
+                except Exception as e:
+                    result['page'] = {'error': str(e)}
+        except KeyboardInterrupt:
+            return
+        except Exception as e:
+            record['cache_hit'] = False
+            record['error'] = str(e)
+        finally:
+            JOB_CONTEXT.job = None
+        
+        record['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        self.emit(record)
+    
+    def emit(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        with self.out_lock:
+            self.out.write(line + "\n")
+            self.out.flush()
+            self.written += 1
+            if 'error' in record:
+                self.failed += 1
+
+def run_batch(args):
+    """Entry point for 'main.py batch'"""
+    state = BrowserState()
+    
+    if args.engines == "all":
+        engines = [e for e, config in SEARCH_ENGINES.items() if config['enabled']]
+    elif args.engines:
+        engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+    else:
+        engines = [state.current_engine]
+    
+    unknown = [e for e in engines if e not in SEARCH_ENGINES]
+    if unknown or not engines:
+        print(f"Unknown engine(s): {', '.join(unknown)}. Available: {', '.join(SEARCH_ENGINES)}", file=sys.stderr)
+        return 2
+    
+    try:
+        stream = sys.stdin if args.file == "-" else open(args.file, encoding='utf-8')
+    except OSError as e:
+        print(f"{Colors.ERROR}❌ Cannot read {args.file}: {e}{Colors.RESET}", file=sys.stderr)
+        return 2
+    
+    network = NetworkManager(state)
+    cache = ResultCache(state.cache_file, RESULT_CACHE['max_entries'])
+    search_mgr = SearchManager(state, network, cache, EngineHealth(state.health_file))
+    page_loader = PageLoader(state, network)
+    runner = BatchRunner(search_mgr, page_loader, engines, args.concurrency, args.pages)
+    
+    started = time.perf_counter()
+    try:
+        written, failed = runner.run(BatchRunner.read_queries(stream))
+    except KeyboardInterrupt:
+        print("Interrupted", file=sys.stderr)
+        return 130
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+    
+    elapsed = time.perf_counter() - started
+    print(f"{written} lines ({failed} failed) in {elapsed:.2f}s, "
+          f"{written / elapsed if elapsed else 0:.1f}/s", file=sys.stderr)
+    return 1 if failed and failed == written else 0
+
+# ==================== API SERVER ====================
+class ApiServer:
+    """Local JSON API over search, page extraction and NavAI.
+    
+    All handlers share one SearchManager, PageLoader and NavAI, and so one
+    connection pool, result cache and set of rate limits. A semaphore caps
+    the number of requests in flight, and stop() lets them finish before
+    the exit flag aborts whatever is still running.
+    """
+    
+    def __init__(self, search_mgr, page_loader, ai, host=None, port=None, max_concurrent=None):
+        from http.server import ThreadingHTTPServer
+        
+        self.search_mgr = search_mgr
+        self.page_loader = page_loader
+        self.ai = ai
+        self.max_concurrent = max_concurrent or SERVER['max_concurrent']
+        self.slots = threading.BoundedSemaphore(self.max_concurrent)
+        self.stopping = threading.Event()
+        self.routes = {
+            '/search': self.handle_search,
+            '/page': self.handle_page,
+            '/ai': self.handle_ai,
+            '/health': self.handle_health
+        }
+        
+        self.httpd = ThreadingHTTPServer((host or SERVER['host'], SERVER['port'] if port is None else port),
+                                         self._handler_class())
+        self.httpd.daemon_threads = False
+        self.httpd.block_on_close = True
+    
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _handler_class(self):
+        from http.server import BaseHTTPRequestHandler
+        api = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            server_version = "NaviDuck"
+            
+            def do_GET(self):
+                api.dispatch(self)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def dispatch(self, request):
+        parsed = urlparse(request.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        route = self.routes.get(parsed.path)
+        
+        if route is None:
+            return self.send(request, 404, {'error': f"Unknown endpoint {parsed.path}", 'endpoints': list(self.routes)})
+        if self.stopping.is_set() or get_exit_flag():
+            return self.send(request, 503, {'error': "Shutting down"})
+        if not self.slots.acquire(timeout=SERVER['queue_timeout']):
+            return self.send(request, 503, {'error': "Too many requests"}, {'Retry-After': '1'})
+        
+        JOB_CONTEXT.job = Job(0, "api", request.path, quiet=True)
+        started = time.perf_counter()
+        try:
+            status, body = route(params)
+        except KeyboardInterrupt:
+            status, body = 503, {'error': "Shutting down"}
+        except Exception as e:
+            status, body = 502, {'error': str(e)}
+        finally:
+            JOB_CONTEXT.job = None
+            self.slots.release()
+        
+        body['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        self.send(request, status, body)
+    
+    def send(self, request, status, body, headers=None):
+        payload = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        try:
+            request.send_response(status)
+            request.send_header('Content-Type', 'application/json; charset=utf-8')
+            request.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                request.send_header(name, value)
+            request.end_headers()
+            request.wfile.write(payload)
+        except OSError:
+            pass  # Client went away
+    
+    def handle_search(self, params):
+        query = params.get('q', '').strip()
+        engine = params.get('engine', self.search_mgr.state.current_engine)
+        if not query:
+            return 400, {'error': "Missing q parameter"}
+        if engine != "all" and engine not in SEARCH_ENGINES:
+            return 400, {'error': f"Unknown engine {engine}", 'engines': list(SEARCH_ENGINES) + ["all"]}
+        
+        results, cache_hit = self.search_mgr.lookup(query, engine)
+        return 200, {'query': query, 'engine': engine, 'cache_hit': cache_hit, 'count': len(results), 'results': results}
+    
+    def handle_page(self, params):
+        url = params.get('url', '').strip()
+        if not url.startswith(("http://", "https://")):
+            return 400, {'error': "url must be an http(s) URL"}
+        return 200, self.page_loader.fetch_page(url)
+    
+    def handle_ai(self, params):
+        question = params.get('q', '').strip()
+        if not question:
+            return 400, {'error': "Missing q parameter"}
+        return 200, {'question': question, 'answer': self.ai.ask(question)}
+    
+    def handle_health(self, params):
+        return 200, {'status': "ok", 'engines': [e for e, config in SEARCH_ENGINES.items() if config['enabled']]}
+    
+    def stop(self):
+        """Ask serve() to shut down (safe to call from a signal handler)"""
+        self.stopping.set()
+    
+    def serve(self):
+        """Serve until stop() or the exit flag, then drain in-flight requests.
+        
+        Requests still running after server.drain_timeout are aborted at
+        their next exit flag check and answered with 503.
+        """
+        server_thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.25},
+                                         name="naviduck-api", daemon=True)
+        server_thread.start()
+        try:
+            while not get_exit_flag() and not self.stopping.wait(0.25):
+                pass
+        finally:
+            # Stop accepting, and let anything already accepted answer 503
+            self.stopping.set()
+            self.httpd.shutdown()
+            
+            # Every slot back means nothing is in flight
+            deadline = time.monotonic() + SERVER['drain_timeout']
+            drained = 0
+            while drained < self.max_concurrent and self.slots.acquire(timeout=max(0, deadline - time.monotonic())):
+                drained += 1
+            
+            set_exit_flag()
+            self.httpd.server_close()
+
+def run_server(args):
+    """Entry point for 'main.py serve'"""
+    state = BrowserState()
+    network = NetworkManager(state)
+    cache = ResultCache(state.cache_file, RESULT_CACHE['max_entries'])
+    search_mgr = SearchManager(state, network, cache, EngineHealth(state.health_file))
+    page_loader = PageLoader(state, network)
+    ai = NavAI(state.icons, cache=cache, network=network)
+    
+    try:
+        server = ApiServer(search_mgr, page_loader, ai, args.host, args.port, args.max_concurrent)
+    except OSError as e:
+        print(f"{Colors.ERROR}❌ Cannot listen on {args.host or SERVER['host']}:{args.port or SERVER['port']}: {e}{Colors.RESET}", file=sys.stderr)
+        return 1
+    
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda signum, frame: server.stop())
+    
+    print(f"{Colors.SUCCESS}✅  NaviDuck API listening on {server.address}{Colors.RESET}", file=sys.stderr)
+    print(f"{Colors.INFO}GET /search?q=&engine=  /page?url=  /ai?q=  /health  (Ctrl+C to stop){Colors.RESET}", file=sys.stderr)
+    server.serve()
+    print(f"{Colors.WARNING}Server stopped{Colors.RESET}", file=sys.stderr)
+    return 0
+
+def finish_profile(args):
+    """Write the trace and, outside the interactive browser, the timing table"""
+    if args.trace:
+        try:
+            PROFILER.write_trace(args.trace)
+        except OSError as e:
+            print(f"Cannot write trace: {e}", file=sys.stderr)
+    if args.command:
+        print("\n".join(profile_report()), file=sys.stderr)
+
+def parse_args(argv=None):
+    import argparse
+    
+    parser = argparse.ArgumentParser(prog="naviduck", description="Terminal web browser with metasearch")
+    parser.add_argument("--profile", action="store_true", help="Time every pipeline stage (see the 'stats' command)")
+    parser.add_argument("--trace", metavar="FILE", help="Write a Chrome trace of all stages to FILE on exit")
+    parser.add_argument("--startup-profile", action="store_true", help="Report how long each startup step takes")
+    parser.add_argument("--offline", action="store_true", help="Open pages from the archive only, never the network")
+    commands = parser.add_subparsers(dest="command")
+    
+    batch = commands.add_parser("batch", help="Run queries from a file (or - for stdin) and print JSON Lines")
+    batch.add_argument("file", nargs="?", default="-", help="One query per line; '#' lines are skipped")
+    batch.add_argument("--engines", help="Comma separated engines, or 'all' (default: configured engine)")
+    batch.add_argument("--concurrency", type=int, default=8, help="Searches running at the same time")
+    batch.add_argument("--pages", type=int, default=0, help="Also fetch and extract the top N result pages")
+    
+    serve = commands.add_parser("serve", help="Serve search, page extraction and NavAI as a local JSON API")
+    serve.add_argument("--host", help=f"Interface to bind (default: {SERVER['host']})")
+    serve.add_argument("--port", type=int, help=f"Port to listen on (default: {SERVER['port']})")
+    serve.add_argument("--max-concurrent", type=int, help=f"Requests handled at once (default: {SERVER['max_concurrent']})")
+    
+    return parser.parse_args(argv)
+
 # ==================== MAIN ====================
 def main():
-    print(f"{Colors.INFO}🌐  Starting NaviDuck Enhanced...{Colors.RESET}")
-    print(f"{Colors.WARNING}⚠️  Press Ctrl+X at any time to quit immediately{Colors.RESET}")
+    STARTUP.mark("module imports")
+    args = parse_args()
+    STARTUP.enabled = args.startup_profile
+    STARTUP.mark("arguments")
     
-    # Check for required packages
-    try:
-        import requests
-    except ImportError:
+    # Check for required packages (without paying for the import yet)
+    import importlib.util
+    if importlib.util.find_spec("requests") is None:
         print(f"{Colors.ERROR}❌ requests library not installed!{Colors.RESET}")
         print(f"{Colors.INFO}Install with: pip install requests{Colors.RESET}")
         sys.exit(1)
+    STARTUP.mark("dependency check")
+    
+    if args.profile or args.trace:
+        PROFILER.enabled = True
+        atexit.register(finish_profile, args)
+    
+    if args.command == "batch":
+        sys.exit(run_batch(args))
+    if args.command == "serve":
+        sys.exit(run_server(args))
+    
+    print(f"{Colors.INFO}🌐  Starting NaviDuck Enhanced...{Colors.RESET}")
+    print(f"{Colors.WARNING}⚠️  Press Ctrl+X at any time to quit immediately{Colors.RESET}")
     
     # Create browser components
     state = BrowserState()
+    state.offline = args.offline
+    if state.offline:
+        print(f"{Colors.WARNING}📴  Offline: history and bookmarks open archived copies{Colors.RESET}")
+    STARTUP.mark("BrowserState + config")
     network = NetworkManager(state)
-    search_mgr = SearchManager(state, network)
+    STARTUP.mark("NetworkManager")
+    cache = ResultCache(state.cache_file, RESULT_CACHE['max_entries'])
+    search_mgr = SearchManager(state, network, cache, EngineHealth(state.health_file))
+    STARTUP.mark("SearchManager + health")
     page_loader = PageLoader(state, network)
     tor_mgr = TorManager(state)
     ui = UIManager(state, search_mgr, page_loader, tor_mgr)
+    STARTUP.mark("PageLoader, Tor, UI")
     
     # Run the application
     try:
@@ -1818,7 +5419,6 @@ def main():
     
     # Cleanup
     try:
-        state.save_data()
         state.save_config()
         print(f"{Colors.SUCCESS}✅  Goodbye!{Colors.RESET}")
     except: